@@ -0,0 +1,75 @@
+"""
+Scaling benchmark for parallel per-column insights.
+
+Builds a wide random dataset, writes it as an uncompressed Arrow IPC file (like the shared
+cache under cache/arrow) and times compute_insights with the columns split into blocks across
+1..N worker processes. Every worker memory-maps the file and reads only its own columns, the same
+way the compute pool does for /insights/generate.
+
+Run from the backend folder:
+    python benchmarks/insights_workers.py --rows 20000 --columns 2000 --max-workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.insights_engine import compute_insights  # noqa: E402
+from services.insights_runner import column_blocks  # noqa: E402
+
+
+def _block_insights(path: str, columns) -> int:
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all().select(columns)
+    return len(compute_insights(table.to_pandas(split_blocks=True)))
+
+
+def _write_dataset(path: str, rows: int, columns: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, columns)), columns=[f"c{i}" for i in range(columns)])
+    df.iloc[rng.integers(0, rows, rows // 100), 0] = np.nan
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+    return table.schema.names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--columns", type=int, default=2_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.arrow")
+        names = _write_dataset(path, args.rows, args.columns)
+        print(f"{args.rows} rows x {args.columns} columns, best of {args.repeat}")
+        print(f"{'workers':>7} {'blocks':>6} {'seconds':>8} {'speedup':>7}")
+
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            blocks = column_blocks(names, workers=workers, min_columns=1)
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                # Warm up: start the processes and fault the mapping into the page cache
+                list(pool.map(_block_insights, [path] * len(blocks), [block[:1] for block in blocks]))
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    list(pool.map(_block_insights, [path] * len(blocks), blocks))
+                    best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            print(f"{workers:>7} {len(blocks):>6} {best:>8.3f} {baseline / best:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,21 @@
 from database import engine, Base
-from models import Dataset, DatasetCleaned, DatasetInsights
+from models import Dataset, DatasetCleaned, DatasetInsights, InsightSnapshot
+
+# create_all only creates missing tables; it never adds columns to existing ones.
+# Databases created before these columns existed need (MySQL):
+#   ALTER TABLE datasets
+#     ADD COLUMN content_hash VARCHAR(64) NULL,
+#     ADD INDEX ix_datasets_content_hash (content_hash),
+#     ADD COLUMN insights_key VARCHAR(100) NULL,
+#     ADD COLUMN insights_snapshot_id INT NULL;
+#   ALTER TABLE dataset_insights
+#     ADD COLUMN metric_value_num DOUBLE NULL,
+#     ADD COLUMN metric_error DOUBLE NULL,
+#     ADD COLUMN snapshot_id INT NULL,
+#     ADD INDEX ix_dataset_insights_lookup (dataset_id, snapshot_id, column_name, metric_name);
+# and, where metric_value_num / metric_error were already added as single-precision FLOAT:
+#   ALTER TABLE dataset_insights MODIFY metric_value_num DOUBLE NULL, MODIFY metric_error DOUBLE NULL;
+# Rows uploaded before content_hash existed keep NULL and are read from uploaded_files/<filename>.
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
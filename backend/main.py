@@ -1,15 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 import os
 
 from database import Base, engine
-from routers import upload, data, insights, reports, graphs  # include graphs
+from routers import upload, data, insights, reports, graphs, jobs  # include graphs
+from services.executor import shutdown_executor
+from services.jobs import WorkerPool
 
 # ✅ Create DB tables if not existing
 Base.metadata.create_all(bind=engine)
 
+# ✅ Background job workers (ingest etc.) and the compute pool live as long as the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = WorkerPool()
+    pool.start()
+    yield
+    shutdown_executor()
+    pool.stop()
+
 # ✅ Initialize FastAPI app
-app = FastAPI(title="Smart Data Dashboard")
+app = FastAPI(title="Smart Data Dashboard", lifespan=lifespan)
 
 # ✅ Ensure static folders exist
 UPLOAD_DIR = "uploaded_files"
@@ -27,6 +39,7 @@ app.include_router(data.router)
 app.include_router(insights.router)
 app.include_router(reports.router)
 app.include_router(graphs.router)  # ✅ added graphs router
+app.include_router(jobs.router)
 
 # ✅ Root endpoint
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -9,10 +9,13 @@ class Dataset(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     filename = Column(String(255), nullable=False)
+    content_hash = Column(String(64), index=True)  # sha256 of the uploaded bytes (blob address)
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     total_rows = Column(Integer, default=0)
     processed_rows = Column(Integer, default=0)
-    status = Column(String(50), default="Pending")  # Pending / Processed / Error
+    status = Column(String(50), default="Pending")  # Pending / Parsing / Processed / Error
+    insights_key = Column(String(100))  # "<content_hash>:<engine version>" of the stored full insight set, NULL if none
+    insights_snapshot_id = Column(Integer)  # snapshot whose insight rows are current, NULL for rows stored before snapshots
 
     cleaned_rows = relationship("DatasetCleaned", back_populates="dataset")
     insights = relationship("DatasetInsights", back_populates="dataset")
@@ -29,10 +32,25 @@ class DatasetCleaned(Base):
 
 class DatasetInsights(Base):
     __tablename__ = "dataset_insights"
+    # Serves every read of a snapshot, optionally narrowed to columns and metrics, from one index range
+    __table_args__ = (
+        Index("ix_dataset_insights_lookup", "dataset_id", "snapshot_id", "column_name", "metric_name"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id"))
     column_name = Column(String(255))
     metric_name = Column(String(50))
     metric_value = Column(String(255))
+    metric_value_num = Column(Float(precision=53), nullable=True)  # numeric form of metric_value, NULL for text/undefined
+    metric_error = Column(Float(precision=53), nullable=True)  # error bound of approximate metrics, NULL when exact
+    snapshot_id = Column(Integer)  # insight_snapshots.id of the set this row belongs to
 
     dataset = relationship("Dataset", back_populates="insights")
+
+
+# One written set of insight rows; its id is the version Dataset.insights_snapshot_id points to
+class InsightSnapshot(Base):
+    __tablename__ = "insight_snapshots"
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Dataset, DatasetCleaned, DatasetInsights
+from services.dataset_loader import cache_stats
+from services.insights_store import current_insights
 
 router = APIRouter(
     prefix="/datasets",
@@ -27,11 +29,17 @@ def list_datasets(db: Session = Depends(get_db)):
             "cleaned_rows_count": db.query(DatasetCleaned)
                                     .filter(DatasetCleaned.dataset_id == d.id).count(),
             "insights_count": db.query(DatasetInsights)
-                                 .filter(DatasetInsights.dataset_id == d.id).count()
+                                 .filter(current_insights(d.id)).count()
         })
     return {"datasets": result}
 
 
+@router.get("/cache/stats")
+def dataset_cache_stats():
+    """Hit/miss counters and memory use of the in-process dataset cache."""
+    return cache_stats()
+
+
 @router.get("/{dataset_id}")
 def get_dataset(dataset_id: int, db: Session = Depends(get_db)):
     dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
@@ -39,7 +47,7 @@ def get_dataset(dataset_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Dataset not found")
 
     cleaned_rows = db.query(DatasetCleaned).filter(DatasetCleaned.dataset_id == dataset.id).all()
-    insights = db.query(DatasetInsights).filter(DatasetInsights.dataset_id == dataset.id).all()
+    insights = db.query(DatasetInsights).filter(current_insights(dataset.id)).all()
 
     return {
         "dataset_id": dataset.id,
@@ -54,7 +62,9 @@ def get_dataset(dataset_id: int, db: Session = Depends(get_db)):
             {
                 "column_name": i.column_name,
                 "metric_name": i.metric_name,
-                "metric_value": i.metric_value
+                "metric_value": i.metric_value,
+                "metric_value_num": i.metric_value_num,
+                "metric_error": i.metric_error
             } for i in insights
         ]
     }
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Dataset
+from services.dataset_io import UnknownColumnsError
+from services.dataset_loader import load_dataset, load_table, parse_columns
+from services.executor import table_to_ipc
+from services.graph_data import (
+    ARROW_STREAM_MEDIA_TYPE, COUNTS_TOP_N, GRAPH_KINDS, LINE_DOWNSAMPLERS, LINE_MAX_POINTS, box_summaries,
+    downsample_line, histogram, parse_bins, raw_graph_table, summaries_table, value_counts, wants_arrow
+)
 from pydantic import BaseModel
-from typing import List
-import pandas as pd
-import os
+from typing import List, Optional
 
-UPLOAD_FOLDER = "uploaded_files"
 
 router = APIRouter(
     prefix="/graphs",
@@ -25,15 +29,82 @@ class CategoricalColumnData(BaseModel):
     column_name: str
     values: List[str]
 
+class HistogramData(BaseModel):
+    column_name: str
+    edges: List[float]  # len(counts) + 1 bin edges
+    counts: List[int]
+
+class BoxSummaryData(BaseModel):
+    column_name: str
+    group: Optional[str] = None  # value of the group_by column, None when not grouped
+    count: int
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    q1: Optional[float] = None
+    median: Optional[float] = None
+    q3: Optional[float] = None
+    max: Optional[float] = None
+    whisker_low: Optional[float] = None  # most extreme values within 1.5 IQR of the quartiles
+    whisker_high: Optional[float] = None
+    outlier_count: int
+    outliers: List[float]  # at most MAX_BOX_OUTLIERS of them
+
+class LineData(BaseModel):
+    column_name: str
+    x: List[int]  # row positions of the kept points
+    y: List[float]
+    total_points: int  # non-missing values before downsampling
+
+class ValueCountsData(BaseModel):
+    column_name: str
+    values: List[str]  # the top_n most frequent values, most frequent first
+    counts: List[int]
+    other_count: int  # rows holding any other (non-missing) value
+    distinct_count: int
+
 class GraphDataResponse(BaseModel):
-    numeric: List[NumericColumnData]
-    categorical: List[CategoricalColumnData]
+    numeric: List[NumericColumnData] = []
+    categorical: List[CategoricalColumnData] = []
+    histograms: List[HistogramData] = []
+    boxes: List[BoxSummaryData] = []
+    lines: List[LineData] = []
+    value_counts: List[ValueCountsData] = []
+
+def _arrow_response(table) -> Response:
+    return Response(content=table_to_ipc(table), media_type=ARROW_STREAM_MEDIA_TYPE)
 
 # ----------------------
 # Endpoint: /graphs/{dataset_id}
 # ----------------------
 @router.get("/{dataset_id}", response_model=GraphDataResponse)
-def generate_graph_data(dataset_id: int, db: Session = Depends(get_db)):
+def generate_graph_data(
+    request: Request,
+    dataset_id: int,
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    kind: str = Query("raw", description="raw (every value), histogram (binned), box (five-number summaries), line (downsampled) or counts (categorical value counts)"),
+    bins: str = Query("auto", description="histogram: bin count or numpy rule (auto, fd, doane, scott, stone, rice, sturges, sqrt)"),
+    range_min: Optional[float] = Query(None, description="histogram: lower edge (default: column minimum)"),
+    range_max: Optional[float] = Query(None, description="histogram: upper edge (default: column maximum)"),
+    group_by: Optional[str] = Query(None, description="box: one box per value of this column"),
+    max_points: int = Query(LINE_MAX_POINTS, ge=3, description="line: points per series after downsampling"),
+    downsample: str = Query("lttb", description="line: lttb (Largest-Triangle-Three-Buckets) or minmax (per-bucket extremes)"),
+    top_n: int = Query(COUNTS_TOP_N, ge=1, description="counts: values listed per column, the rest are summed as other"),
+    db: Session = Depends(get_db)
+):
+    """
+    Graph data of a dataset as JSON, or as an Arrow IPC stream when the request sends
+    Accept: application/vnd.apache.arrow.stream (kind=raw: the dataset's columns; other kinds:
+    one row per summary).
+    """
+    if kind not in GRAPH_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(GRAPH_KINDS)}")
+    if downsample not in LINE_DOWNSAMPLERS:
+        raise HTTPException(status_code=400, detail=f"downsample must be one of: {', '.join(LINE_DOWNSAMPLERS)}")
+    try:
+        bins = parse_bins(bins)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # 1️⃣ Fetch dataset from DB
     dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
     print("Requested Dataset ID:", dataset_id)
@@ -42,26 +113,69 @@ def generate_graph_data(dataset_id: int, db: Session = Depends(get_db)):
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    # 2️⃣ Check file existence
-    file_path = os.path.join(UPLOAD_FOLDER, dataset.filename)
-    print("File path:", file_path)
-    print("File exists:", os.path.exists(file_path))
-
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Dataset file not found on server")
-
-    # 3️⃣ Read dataset
+    # 2️⃣ Load dataset (shared cache over the Parquet sidecar)
+    selected_columns = parse_columns(columns)
+    if kind == "box" and group_by is not None and selected_columns is not None and group_by not in selected_columns:
+        selected_columns.append(group_by)
+    arrow = wants_arrow(request.headers.get("accept"))
     try:
-        if dataset.filename.lower().endswith(".csv"):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
+        if arrow and kind == "raw":
+            # Straight from the memory-mapped Arrow cache to the IPC stream, no pandas or pydantic
+            return _arrow_response(raw_graph_table(load_table(dataset.id, columns=selected_columns, db=db)))
+        df = load_dataset(dataset.id, columns=selected_columns, db=db)
+    except UnknownColumnsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Dataset file not found on server")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
 
-    # 4️⃣ Separate numeric and categorical columns
+    # 3️⃣ Separate numeric and categorical columns
     numeric_cols = df.select_dtypes(include='number').columns
-    categorical_cols = df.select_dtypes(include='object').columns
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+
+    # Histograms: the payload grows with the bin count instead of the row count
+    if kind == "histogram":
+        histograms = []
+        for col in numeric_cols:
+            values = df[col].to_numpy(dtype=float, na_value=float("nan"))
+            try:
+                edges, counts = histogram(values, bins, range_min, range_max)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            histograms.append(HistogramData(column_name=col, edges=edges, counts=counts))
+        return _arrow_response(summaries_table("histogram", histograms)) if arrow else GraphDataResponse(histograms=histograms)
+
+    # Box plots: five-number summaries, whiskers and a capped list of outliers per column (and group)
+    if kind == "box":
+        if group_by is not None and group_by not in df.columns:
+            raise HTTPException(status_code=400, detail=str(UnknownColumnsError([group_by])))
+        groups = df[group_by] if group_by is not None else None
+        boxes = [
+            BoxSummaryData(column_name=col, group=group, **summary)
+            for col in numeric_cols if col != group_by
+            for group, summary in box_summaries(df[col].to_numpy(dtype=float, na_value=float("nan")), groups)
+        ]
+        return _arrow_response(summaries_table("box", boxes)) if arrow else GraphDataResponse(boxes=boxes)
+
+    # Line plots: at most max_points points per series, chosen to keep the shape of the line
+    if kind == "line":
+        lines = []
+        for col in numeric_cols:
+            values = df[col].to_numpy(dtype=float, na_value=float("nan"))
+            x, y, total = downsample_line(values, max_points, downsample)
+            lines.append(LineData(column_name=col, x=x, y=y, total_points=total))
+        return _arrow_response(summaries_table("line", lines)) if arrow else GraphDataResponse(lines=lines)
+
+    # Value counts: top_n bars plus an "other" total instead of every raw string
+    if kind == "counts":
+        counts = []
+        for col in categorical_cols:
+            values, value_totals, other, distinct = value_counts(df[col], top_n)
+            counts.append(ValueCountsData(
+                column_name=col, values=values, counts=value_totals, other_count=other, distinct_count=distinct
+            ))
+        return _arrow_response(summaries_table("counts", counts)) if arrow else GraphDataResponse(value_counts=counts)
 
     numeric_data = [
         NumericColumnData(column_name=col, values=df[col].dropna().tolist())
@@ -73,5 +187,5 @@ def generate_graph_data(dataset_id: int, db: Session = Depends(get_db)):
         for col in categorical_cols
     ]
 
-    # 5️⃣ Return data
+    # 4️⃣ Return data
     return GraphDataResponse(numeric=numeric_data, categorical=categorical_data)
@@ -1,12 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import pandas as pd
-import os
+from typing import Optional
 
 from database import get_db
-from models import Dataset, DatasetInsights
+from models import Dataset
+from services.correlations import (
+    CORRELATION_METHODS, NonNumericColumnsError, correlation_cache_key, correlation_task, matrix_top_pairs,
+    read_cached_result, read_result
+)
+from services.dataset_io import UnknownColumnsError
+from services.executor import ipc_to_table, run_compute
+from services.dataset_loader import parse_columns
+from services.insights_engine import INSIGHT_FIELDS
+from services.insights_runner import INSIGHT_MODES, run_insights
+from services.insights_stream import resolve_mode
+from services.insights_store import cached_insights_count, insights_cache_key, query_insights, replace_insights
+from services.jobs import enqueue
+from services.storage import correlation_cache_path
 
-UPLOAD_FOLDER = "uploaded_files"
 
 router = APIRouter(
     prefix="/insights",
@@ -14,90 +28,163 @@ router = APIRouter(
 )
 
 @router.get("/generate/{dataset_id}")
-def generate_insights(dataset_id: int, db: Session = Depends(get_db)):
-    dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+async def generate_insights(
+    dataset_id: int,
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    force: bool = Query(False, description="Recompute even if stored insights are up to date"),
+    mode: str = Query("auto", description="exact (in memory), stream (chunked, approximate quartiles/mode), approx (sampled rows) or auto"),
+    sample: Optional[float] = Query(None, gt=0, description="approx mode: fraction of rows if <= 1, else a row count"),
+    stratify: Optional[str] = Query(None, description="approx mode: column whose groups are sampled proportionally"),
+    schedule_exact: bool = Query(False, description="approx mode: queue an exact recompute in the background"),
+    db: Session = Depends(get_db)
+):
+    if mode not in INSIGHT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(INSIGHT_MODES)}")
+    if sample is not None and sample > 1 and not sample.is_integer():
+        raise HTTPException(status_code=400, detail="sample must be a fraction of the rows (<= 1) or a whole row count")
+
+    dataset = await run_in_threadpool(db.get, Dataset, dataset_id)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
+    # Read before anything commits: commits expire the instance, and reloading it here would block the event loop
+    filename = dataset.filename
 
-    file_path = os.path.join(UPLOAD_FOLDER, dataset.filename)
-    if not os.path.exists(file_path):
+    # Datasets above INSIGHTS_STREAM_THRESHOLD are profiled chunk by chunk with mergeable sketches
+    try:
+        mode = await run_in_threadpool(resolve_mode, dataset, mode)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found on server")
 
+    selected_columns = parse_columns(columns)
+
+    def queue_exact_recompute():
+        # Approximate answer now, exact rows later (poll /jobs/{job_id}); nothing to do if exact ones are stored
+        if mode != "approx" or not schedule_exact or dataset.insights_key == insights_cache_key(dataset):
+            return None
+        return enqueue("insights", {"dataset_id": dataset.id, "columns": selected_columns})
+
+    # Stored insights are reused while the file content and the engine version are unchanged
+    if not force:
+        cached_count = await run_in_threadpool(cached_insights_count, db, dataset, selected_columns, mode)
+        if cached_count is not None:
+            return {
+                "dataset_id": dataset_id,
+                "filename": filename,
+                "insights_count": cached_count,
+                "cached": True,
+                "mode": mode,
+                "exact_job_id": await run_in_threadpool(queue_exact_recompute),
+                "message": "Insights are up to date, returning stored results"
+            }
+
+    # Statistics run in the compute pool (column blocks in parallel); the event loop only awaits them
     try:
-        df = pd.read_csv(file_path) if dataset.filename.lower().endswith(".csv") else pd.read_excel(file_path)
+        table = await run_insights(dataset, selected_columns, mode, sample, stratify)
+    except UnknownColumnsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found on server")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
 
-    # Clear previous insights for this dataset
-    db.query(DatasetInsights).filter(DatasetInsights.dataset_id == dataset.id).delete()
-    db.commit()
-
-    insights_to_add = []
-    for col in df.columns:
-        col_data = df[col]
-
-        # Missing values count
-        insights_to_add.append(
-            DatasetInsights(
-                dataset_id=dataset.id,
-                column_name=col,
-                metric_name="missing_count",
-                metric_value=str(col_data.isnull().sum())
-            )
-        )
-
-        # Only numeric columns
-        if pd.api.types.is_numeric_dtype(col_data):
-            # Mean
-            insights_to_add.append(
-                DatasetInsights(
-                    dataset_id=dataset.id,
-                    column_name=col,
-                    metric_name="mean",
-                    metric_value=str(col_data.mean())
-                )
-            )
-
-            # Standard deviation
-            insights_to_add.append(
-                DatasetInsights(
-                    dataset_id=dataset.id,
-                    column_name=col,
-                    metric_name="std_dev",
-                    metric_value=str(col_data.std())
-                )
-            )
-
-            # Quartiles (Q1, Q2, Q3, Q4)
-            quantiles = col_data.quantile([0.25, 0.5, 0.75, 1.0])
-            q_names = ["Q1", "Q2 (Median)", "Q3", "Q4 (Max)"]
-            for q_name, q_val in zip(q_names, quantiles):
-                insights_to_add.append(
-                    DatasetInsights(
-                        dataset_id=dataset.id,
-                        column_name=col,
-                        metric_name=q_name,
-                        metric_value=str(q_val)
-                    )
-                )
-
-            # Mode (first mode)
-            mode_val = col_data.mode().iloc[0] if not col_data.mode().empty else None
-            insights_to_add.append(
-                DatasetInsights(
-                    dataset_id=dataset.id,
-                    column_name=col,
-                    metric_name="mode",
-                    metric_value=str(mode_val)
-                )
-            )
-
-    db.add_all(insights_to_add)
-    db.commit()
+    metadata = table.schema.metadata or {}
+    sample_rows = int(metadata[b"sample_rows"]) if b"sample_rows" in metadata else None
+    if sample_rows is not None and sample_rows == int(metadata[b"total_rows"]):
+        # The sample covered every row, so these are the exact results and are stored as such
+        mode = "exact"
+
+    rows = zip(*(table.column(name).to_pylist() for name in INSIGHT_FIELDS))
+    insights_count = await run_in_threadpool(replace_insights, db, dataset, rows, selected_columns, mode)
 
+    return {
+        "dataset_id": dataset_id,
+        "filename": filename,
+        "insights_count": insights_count,
+        "cached": False,
+        "mode": mode,
+        "sample_rows": sample_rows,
+        "exact_job_id": await run_in_threadpool(queue_exact_recompute),
+        "message": "Insights generated successfully with quartiles, mode, std deviation, skewness and kurtosis"
+    }
+
+
+@router.get("/{dataset_id}")
+async def get_insights(
+    dataset_id: int,
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    metrics: Optional[str] = Query(None, description="Comma-separated metric names, e.g. mean,std_dev (default: all)"),
+    db: Session = Depends(get_db)
+):
+    """Stored insights of a dataset's current snapshot; read-only, nothing is recomputed."""
+    dataset = await run_in_threadpool(db.get, Dataset, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    rows = await run_in_threadpool(query_insights, db, dataset.id, parse_columns(columns), parse_columns(metrics))
     return {
         "dataset_id": dataset.id,
-        "filename": dataset.filename,
-        "insights_count": len(insights_to_add),
-        "message": "Insights generated successfully with quartiles, mode, and std deviation"
+        "insights_count": len(rows),
+        "insights": [dict(zip(INSIGHT_FIELDS, row)) for row in rows]
     }
+
+
+def _correlation_value(value):
+    return None if value is None or math.isnan(value) else round(value, 6)
+
+
+def _correlation_body(table, top_k):
+    if top_k is not None:
+        return {"pairs": [
+            {"column_a": a, "column_b": b, "correlation": _correlation_value(r)}
+            for a, b, r in zip(*(table.column(name).to_pylist() for name in ("column_a", "column_b", "correlation")))
+        ]}
+    columns = table.schema.names
+    rows = zip(*(table.column(k).to_pylist() for k in range(table.num_columns))) if columns else []
+    return {"columns": columns, "matrix": [[_correlation_value(r) for r in row] for row in rows]}
+
+
+@router.get("/{dataset_id}/correlations")
+async def get_correlations(
+    dataset_id: int,
+    method: str = Query("pearson", description="pearson or spearman"),
+    columns: Optional[str] = Query(None, description="Comma-separated numeric columns (default: all numeric)"),
+    top_k: Optional[int] = Query(None, ge=1, description="Return only the k most strongly correlated pairs instead of the matrix"),
+    force: bool = Query(False, description="Recompute even if a cached result exists"),
+    db: Session = Depends(get_db)
+):
+    if method not in CORRELATION_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(CORRELATION_METHODS)}")
+
+    dataset = await run_in_threadpool(db.get, Dataset, dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    # Results are cached on disk by content hash, method and column selection
+    selected_columns = parse_columns(columns)
+    path = correlation_cache_path(dataset, correlation_cache_key(method, selected_columns, top_k))
+    matrix_path = correlation_cache_path(dataset, correlation_cache_key(method, selected_columns))
+
+    table = None
+    if path is not None and not force:
+        table = await run_in_threadpool(read_cached_result, path)
+        if table is None and top_k is not None:
+            # The full matrix may be cached: its top pairs are cheap to read off
+            matrix = await run_in_threadpool(read_cached_result, matrix_path)
+            if matrix is not None:
+                table = await run_in_threadpool(matrix_top_pairs, matrix, top_k)
+    cached = table is not None
+
+    if table is None:
+        try:
+            result = await run_compute(correlation_task, dataset.id, path, method, selected_columns, top_k)
+        except (UnknownColumnsError, NonNumericColumnsError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found on server")
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
+        # Uncached datasets (no content hash) get the result back directly
+        table = await run_in_threadpool(read_result, result) if path is not None else ipc_to_table(result)
+
+    body = await run_in_threadpool(_correlation_body, table, top_k)
+    return {"dataset_id": dataset.id, "method": method, "top_k": top_k, "cached": cached, **body}
@@ -1,63 +1,249 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+import hashlib
 import os
-import pandas as pd
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
 
 from database import get_db
 from models import Dataset
+from services.insights_store import copy_insights, new_snapshot
+from services.jobs import enqueue
+from services.row_count import CsvRowCounter, count_xlsx_rows
+from services.storage import new_temp_path, commit_blob
 
-UPLOAD_FOLDER = "uploaded_files"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Uploads are copied to disk in fixed-size chunks so memory per request stays flat
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # 1 MiB
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 5 * 1024 ** 3))  # 5 GiB
+# Room for the multipart framing (boundaries, part headers) when checking Content-Length against MAX_UPLOAD_SIZE
+MULTIPART_OVERHEAD = 64 * 1024
 
 router = APIRouter(
     prefix="/upload",
     tags=["Upload"]
 )
 
-def get_unique_filename(folder: str, filename: str) -> str:
-    base, ext = os.path.splitext(filename)
-    counter = 1
-    new_filename = filename
-    while os.path.exists(os.path.join(folder, new_filename)):
-        new_filename = f"{base}_{counter}{ext}"
-        counter += 1
-    return new_filename
-
-@router.post("/")
-async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not (file.filename.endswith(".csv") or file.filename.endswith(".xlsx")):
+def _consume_chunk(buffer, hasher, row_counter: CsvRowCounter, chunk: bytes):
+    buffer.write(chunk)
+    hasher.update(chunk)
+    if row_counter is not None:
+        row_counter.feed(chunk)
+
+def _discard(file_path: str):
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {MAX_UPLOAD_SIZE} bytes")
+
+class _UploadPart:
+    """
+    The `file` field of a multipart/form-data body, fed to python-multipart as the body arrives.
+    `filename` is set once the part's headers are parsed; its bytes collect in `data` until drained.
+    """
+
+    def __init__(self, boundary: bytes):
+        self.filename = None
+        self.data = []
+        self._headers = {}
+        self._field = self._value = b""
+        self._in_file = False
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        })
+
+    def _part_begin(self):
+        self._headers = {}
+
+    def _header_field(self, data, start, end):
+        self._field += data[start:end]
+
+    def _header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def _header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") == b"file" and self.filename is None:
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+            self._in_file = True
+
+    def _part_data(self, data, start, end):
+        if self._in_file:
+            self.data.append(bytes(data[start:end]))
+
+    def _part_end(self):
+        self._in_file = False
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self.data)
+        self.data.clear()
+        return chunk
+
+def _check_filename(filename: str) -> str:
+    filename = os.path.basename(filename)
+    if not (filename.endswith(".csv") or filename.endswith(".xlsx")):
         raise HTTPException(status_code=400, detail="Only CSV or Excel files are allowed")
-    
-    # Generate unique filename
-    unique_filename = get_unique_filename(UPLOAD_FOLDER, file.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
+    return filename
 
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
+async def save_upload_stream(request: Request):
+    """
+    Copy the `file` field of a multipart upload straight from the network to a temp file, chunk by
+    chunk, and return (filename, temp path, bytes written, sha256 hex digest, CSV row counter or None).
+    The body is parsed as it arrives, so the file is written to disk once and MAX_UPLOAD_SIZE
+    applies to the actual read: an oversized Content-Length is refused before reading anything,
+    and a body that grows past the limit is aborted with 413 (removing the partial file).
+    Disk writes, hashing and row counting run in the threadpool, so the event loop only awaits them.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD:
+        raise _too_large()
 
-    # Read to get total rows
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type.lower() != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload with a 'file' field")
+
+    part = _UploadPart(options[b"boundary"])
+    filename = temp_path = buffer = row_counter = None
+    bytes_written = 0
+    hasher = hashlib.sha256()
     try:
-        df = pd.read_csv(file_path) if unique_filename.endswith(".csv") else pd.read_excel(file_path)
+        try:
+            async for received in request.stream():
+                try:
+                    part.parser.write(received)
+                except MultipartParseError as e:
+                    raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {e}")
+                if buffer is None and part.filename is not None:
+                    filename = _check_filename(part.filename)
+                    ext = os.path.splitext(filename)[1]
+                    row_counter = CsvRowCounter() if ext == ".csv" else None
+                    temp_path = new_temp_path(ext)
+                    buffer = await run_in_threadpool(open, temp_path, "wb")
+
+                pending = sum(len(data) for data in part.data)
+                if bytes_written + pending > MAX_UPLOAD_SIZE:
+                    raise _too_large()
+                if buffer is not None and pending >= UPLOAD_CHUNK_SIZE:
+                    chunk = part.drain()
+                    bytes_written += len(chunk)
+                    await run_in_threadpool(_consume_chunk, buffer, hasher, row_counter, chunk)
+            try:
+                part.parser.finalize()
+            except MultipartParseError as e:
+                raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {e}")
+
+            if buffer is None:
+                raise HTTPException(status_code=400, detail="The upload has no 'file' field")
+            chunk = part.drain()
+            if chunk:
+                bytes_written += len(chunk)
+                await run_in_threadpool(_consume_chunk, buffer, hasher, row_counter, chunk)
+        finally:
+            if buffer is not None:
+                await run_in_threadpool(buffer.close)
+    except BaseException:
+        if temp_path is not None:
+            await run_in_threadpool(_discard, temp_path)
+        raise
+    return filename, temp_path, bytes_written, hasher.hexdigest(), row_counter
+
+def reuse_processed_dataset(db: Session, dataset: Dataset, source: Dataset):
+    """Mark `dataset` as processed from an identical earlier upload and copy its insights server-side."""
+    dataset.total_rows = source.total_rows
+    dataset.processed_rows = source.processed_rows
+    dataset.status = "Processed"
+    dataset.insights_key = source.insights_key
+
+    # The source's current snapshot becomes the first snapshot of the new dataset
+    dataset.insights_snapshot_id = new_snapshot(db, dataset.id)
+    copy_insights(db, source.id, dataset.id, dataset.insights_snapshot_id)
+
+def register_upload(db: Session, temp_path: str, filename: str, content_hash: str, row_counter: CsvRowCounter = None):
+    """
+    Blocking half of an upload: move the file to its content address, count XLSX rows, create the
+    Dataset and either reuse an identical processed upload or queue the ingest job.
+    Returns (dataset, created, job_id).
+    """
+    ext = os.path.splitext(filename)[1]
+
+    # Move it to its content address; identical bytes are stored only once
+    file_path, created = commit_blob(temp_path, content_hash, ext)
+
+    # Get total rows without parsing the whole file
+    try:
+        total_rows = row_counter.total_rows if row_counter is not None else count_xlsx_rows(file_path)
     except Exception as e:
+        if created:
+            os.remove(file_path)
         raise HTTPException(status_code=400, detail=f"Error reading file: {e}")
 
-    total_rows = len(df)
-
     # Save metadata
     dataset = Dataset(
-        name=os.path.splitext(unique_filename)[0],
-        filename=unique_filename,
+        name=os.path.splitext(filename)[0],
+        filename=filename,
+        content_hash=content_hash,
         total_rows=total_rows,
-        status="uploaded"
+        processed_rows=0,
+        status="Pending"
     )
     db.add(dataset)
+    db.flush()
+
+    # Same bytes already processed: reuse the parsed results instead of recomputing them
+    source = (
+        db.query(Dataset)
+        .filter(Dataset.content_hash == content_hash, Dataset.status == "Processed", Dataset.id != dataset.id)
+        .order_by(Dataset.id.desc())
+        .first()
+    )
+    if source:
+        reuse_processed_dataset(db, dataset, source)
+
     db.commit()
     db.refresh(dataset)
 
+    # Otherwise parsing happens in a background worker; poll /jobs/{job_id} or the dataset status
+    job_id = None if source else enqueue("ingest", {"dataset_id": dataset.id})
+    return dataset, created, job_id
+
+@router.post("/", openapi_extra={
+    "requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}
+    }}}}
+})
+async def upload_file(request: Request, db: Session = Depends(get_db)):
+    # Stream the file to a temp path as it arrives (CSV rows are counted and the content hashed on the way)
+    filename, temp_path, size_bytes, content_hash, row_counter = await save_upload_stream(request)
+
+    # Everything after the stream touches disk or the database, so it runs off the event loop
+    dataset, created, job_id = await run_in_threadpool(
+        register_upload, db, temp_path, filename, content_hash, row_counter
+    )
+
     return {
-        "message": "File uploaded successfully",
-        "filename": unique_filename,
-        "total_rows": total_rows,
-        "dataset_id": dataset.id
+        "message": "File uploaded successfully, processing started" if job_id else "File uploaded successfully",
+        "filename": filename,
+        "size_bytes": size_bytes,
+        "content_hash": content_hash,
+        "deduplicated": not created,
+        "total_rows": dataset.total_rows,
+        "dataset_id": dataset.id,
+        "job_id": job_id,
+        "status": dataset.status
     }
@@ -0,0 +1,212 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from services.dataset_loader import load_table
+from services.executor import table_to_ipc
+from services.storage import CORRELATION_CACHE_FOLDER, prune_cache
+
+# Bump whenever the formulas change, so cached matrices get recomputed
+CORRELATION_VERSION = "1"
+CORRELATION_METHODS = ("pearson", "spearman")
+# Columns per block of the blockwise product; one block pair holds rows x 2 blocks float32 values
+CORRELATION_BLOCK_COLUMNS = int(os.getenv("CORRELATION_BLOCK_COLUMNS", 256))
+# Disk budget of the correlation cache; least recently used results are removed past it
+CORRELATION_CACHE_MAX_BYTES = int(os.getenv("CORRELATION_CACHE_MAX_BYTES", 1024 ** 3))  # 1 GiB
+
+
+class NonNumericColumnsError(ValueError):
+    """Raised when a correlation request selects columns that are not numeric."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        super().__init__(f"Columns are not numeric: {', '.join(map(str, self.columns))}")
+
+    def __reduce__(self):
+        # Rebuild from the column list when raised inside a compute-pool worker
+        return type(self), (self.columns,)
+
+
+def correlation_cache_key(method: str, columns=None, top_k: int = None) -> str:
+    """File-name safe key of one correlation result of a dataset."""
+    selection = "\x1f".join(map(str, columns)) if columns is not None else "*"
+    digest = hashlib.sha1(f"{CORRELATION_VERSION}\x1e{selection}".encode()).hexdigest()[:16]
+    return f"{method}_{digest}_{'full' if top_k is None else f'top{top_k}'}"
+
+
+def _is_numeric(dtype: pa.DataType) -> bool:
+    return pa.types.is_integer(dtype) or pa.types.is_floating(dtype) or pa.types.is_boolean(dtype)
+
+
+def _standardize(table: pa.Table, columns, method: str):
+    """
+    A block of columns as standardized float32 values (mean 0, sample std 1, missing = 0) plus the
+    float32 mask of present values (None when nothing is missing). Spearman ranks each column first
+    (average ranks for ties). Constant and all-missing columns come back flagged in `degenerate`.
+    """
+    X = np.column_stack([pc.cast(table.column(c), pa.float64()).to_numpy() for c in columns])
+    if method == "spearman":
+        X = pd.DataFrame(X).rank(method="average").to_numpy()
+
+    valid = ~np.isnan(X)
+    n = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, X, 0.0).sum(axis=0) / n
+        dev = np.where(valid, X - mean, 0.0)
+        std = np.sqrt((dev * dev).sum(axis=0) / (n - 1))
+        degenerate = ~(std > 0)
+        Z = (dev / np.where(degenerate, 1.0, std)).astype(np.float32)
+    mask = None if valid.all() else valid.astype(np.float32)
+    return Z, mask, degenerate
+
+
+def _block_correlations(a, b) -> np.ndarray:
+    """
+    Correlations between the columns of two standardized blocks. Without missing values this is
+    one product Za.T @ Zb / (n - 1); otherwise each pair uses the rows where both are present
+    (like pandas), from the per-pair counts, sums and sums of squares written as products with the masks.
+    """
+    Za, Ma, bad_a = a
+    Zb, Mb, bad_b = b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if Ma is None and Mb is None:
+            C = Za.T @ Zb / np.float32(len(Za) - 1)
+        else:
+            Ma = np.ones_like(Za) if Ma is None else Ma
+            Mb = np.ones_like(Zb) if Mb is None else Mb
+            n = Ma.T @ Mb
+            sum_a, sum_b = Za.T @ Mb, Ma.T @ Zb
+            cov = Za.T @ Zb - sum_a * sum_b / n
+            var_a = (Za * Za).T @ Mb - sum_a * sum_a / n
+            var_b = Ma.T @ (Zb * Zb) - sum_b * sum_b / n
+            C = cov / np.sqrt(var_a * var_b)
+            C[n < 2] = np.nan
+    C = np.clip(C, -1.0, 1.0)
+    C[bad_a, :] = np.nan
+    C[:, bad_b] = np.nan
+    return C
+
+
+def numeric_columns(table: pa.Table, columns=None):
+    """The columns to correlate: all numeric ones by default; selecting a non-numeric one is an error."""
+    if columns is None:
+        return [field.name for field in table.schema if _is_numeric(field.type)]
+    rejected = [c for c in columns if not _is_numeric(table.schema.field(c).type)]
+    if rejected:
+        raise NonNumericColumnsError(rejected)
+    return list(columns)
+
+
+def correlation_blocks(table: pa.Table, columns, method: str, block_columns: int = CORRELATION_BLOCK_COLUMNS):
+    """
+    Yield (row offset, column offset, correlations) for the upper-triangle block pairs of the matrix.
+    Only two standardized blocks are in memory at a time, so the row count times the number of
+    columns never has to fit at once; the price is re-standardizing the column block of every pair.
+    """
+    starts = range(0, len(columns), max(block_columns, 1))
+    for i in starts:
+        block_i = _standardize(table, columns[i:i + block_columns], method)
+        for j in starts:
+            if j < i:
+                continue
+            block_j = block_i if j == i else _standardize(table, columns[j:j + block_columns], method)
+            yield i, j, _block_correlations(block_i, block_j)
+
+
+def correlation_matrix(table: pa.Table, columns, method: str) -> pa.Table:
+    """The full matrix as a table with one float32 column per input column (rows in the same order)."""
+    width = len(columns)
+    R = np.full((width, width), np.nan, dtype=np.float32)
+    for i, j, C in correlation_blocks(table, columns, method):
+        R[i:i + C.shape[0], j:j + C.shape[1]] = C
+        R[j:j + C.shape[1], i:i + C.shape[0]] = C.T
+    with np.errstate(invalid="ignore"):
+        diagonal = np.where(np.isnan(np.diag(R)), np.nan, 1.0)
+    R[np.arange(width), np.arange(width)] = diagonal
+    return pa.Table.from_arrays([pa.array(R[:, k]) for k in range(width)], names=[str(c) for c in columns])
+
+
+def _pairs_table(a, b, r, columns) -> pa.Table:
+    order = np.argsort(-np.abs(r), kind="stable")
+    return pa.table({
+        "column_a": pa.array([str(columns[k]) for k in a[order]], pa.string()),
+        "column_b": pa.array([str(columns[k]) for k in b[order]], pa.string()),
+        "correlation": pa.array(r[order], pa.float32()),
+    })
+
+
+def _keep_strongest(a, b, r, top_k: int):
+    if len(r) <= top_k:
+        return a, b, r
+    keep = np.argpartition(-np.abs(r), top_k - 1)[:top_k]
+    return a[keep], b[keep], r[keep]
+
+
+def top_pairs(table: pa.Table, columns, method: str, top_k: int) -> pa.Table:
+    """
+    The `top_k` column pairs with the largest absolute correlation, strongest first. Each block's
+    candidates are folded into a running top-k, so the N x N matrix is never materialized.
+    """
+    a = b = np.empty(0, dtype=np.int64)
+    r = np.empty(0, dtype=np.float32)
+    for i, j, C in correlation_blocks(table, columns, method):
+        rows, cols = np.nonzero(~np.isnan(C))
+        if i == j:
+            upper = cols > rows
+            rows, cols = rows[upper], cols[upper]
+        a, b, r = _keep_strongest(
+            np.concatenate([a, rows + i]), np.concatenate([b, cols + j]), np.concatenate([r, C[rows, cols]]), top_k
+        )
+    return _pairs_table(a, b, r, columns)
+
+
+def matrix_top_pairs(matrix: pa.Table, top_k: int) -> pa.Table:
+    """Top pairs read off an already computed full matrix (e.g. a cached one)."""
+    columns = matrix.schema.names
+    R = np.column_stack([matrix.column(k).to_numpy() for k in range(matrix.num_columns)]) if columns else np.empty((0, 0))
+    rows, cols = np.triu_indices(len(columns), k=1)
+    values = R[rows, cols]
+    present = ~np.isnan(values)
+    return _pairs_table(*_keep_strongest(rows[present], cols[present], values[present], top_k), columns)
+
+
+def write_result(table: pa.Table, path: str):
+    """Write a result as an Arrow IPC file; the rename makes it visible to other readers atomically."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.ipc.new_file(temp_path, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(temp_path, path)
+
+
+def read_result(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def read_cached_result(path: str):
+    """A cached result, or None when there is none (never computed, or pruned meanwhile)."""
+    try:
+        # Cache recency is tracked through mtime
+        os.utime(path)
+        return read_result(path)
+    except FileNotFoundError:
+        return None
+
+
+def correlation_task(dataset_id: int, path: str, method: str = "pearson", columns=None, top_k: int = None):
+    """
+    Compute-pool entry point: correlate the numeric columns of a dataset (memory-mapped from the
+    Arrow cache) and write the matrix, or its top pairs, to the cache file at `path`, pruning the
+    cache to CORRELATION_CACHE_MAX_BYTES. Without a `path` the result comes back as IPC bytes.
+    """
+    table = load_table(dataset_id, columns=columns)  # raises UnknownColumnsError for missing names
+    columns = numeric_columns(table, table.schema.names if columns is not None else None)
+    result = correlation_matrix(table, columns, method) if top_k is None else top_pairs(table, columns, method, top_k)
+    if path is None:
+        return table_to_ipc(result)
+    write_result(result, path)
+    prune_cache(CORRELATION_CACHE_FOLDER, CORRELATION_CACHE_MAX_BYTES, keep=path)
+    return path
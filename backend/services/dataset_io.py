@@ -0,0 +1,249 @@
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from services.storage import (
+    ARROW_CACHE_FOLDER, dataset_file_path, parquet_path, arrow_cache_path, new_temp_path, prune_cache
+)
+
+# Bytes of CSV parsed per record batch while building the Parquet sidecar
+INGEST_BLOCK_SIZE = int(os.getenv("INGEST_BLOCK_SIZE", 16 * 1024 * 1024))  # 16 MiB
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+# Disk budget of the shared Arrow IPC cache; least recently used files are removed past it
+ARROW_CACHE_MAX_BYTES = int(os.getenv("ARROW_CACHE_MAX_BYTES", 8 * 1024 ** 3))  # 8 GiB
+
+
+class UnknownColumnsError(ValueError):
+    """Raised when a column projection names columns the dataset does not have."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        super().__init__(f"Unknown columns: {', '.join(self.columns)}")
+
+    def __reduce__(self):
+        # Rebuild from the column list when raised inside a compute-pool worker
+        return type(self), (self.columns,)
+
+
+def _check_columns(available, columns):
+    missing = [c for c in columns if c not in set(available)]
+    if missing:
+        raise UnknownColumnsError(missing)
+
+
+def _read_original(file_path: str, columns=None) -> pd.DataFrame:
+    if file_path.lower().endswith(".csv"):
+        if columns is not None:
+            _check_columns(pd.read_csv(file_path, nrows=0).columns, columns)
+        return pd.read_csv(file_path, usecols=columns)[columns] if columns is not None else pd.read_csv(file_path)
+    if columns is not None:
+        _check_columns(pd.read_excel(file_path, nrows=0).columns, columns)
+    return pd.read_excel(file_path, usecols=columns)[columns] if columns is not None else pd.read_excel(file_path)
+
+
+def _table_from_pandas(df: pd.DataFrame) -> pa.Table:
+    """
+    Arrow table of a DataFrame parsed by pandas. Object columns holding mixed types (e.g. numbers and
+    text in one XLSX column) cannot be converted as they are, so on failure they are stored as text.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            values = df[column]
+            df[column] = values.astype(str).where(values.notna(), None)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _write_csv_batches(file_path: str, out_path: str, on_progress=None) -> int:
+    """Stream a CSV into Parquet batch by batch; column types are inferred from the first block."""
+    reader = pa_csv.open_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(block_size=INGEST_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+    )
+    rows = 0
+    with pq.ParquetWriter(out_path, reader.schema, compression=PARQUET_COMPRESSION) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            if on_progress:
+                on_progress(rows)
+    return rows
+
+
+def write_parquet_sidecar(dataset, on_progress=None) -> int:
+    """
+    Convert a dataset's original CSV/XLSX into its compressed Parquet sidecar and return the row count.
+    CSVs are streamed in blocks; if a later block does not fit the types inferred from the first one
+    (e.g. text in a column that started numeric) the file is re-read with pandas instead.
+    The sidecar is written to a temp file and moved into place, so readers never see a partial file.
+    """
+    file_path = dataset_file_path(dataset)
+    temp_path = new_temp_path(".parquet")
+    try:
+        rows = None
+        if file_path.lower().endswith(".csv"):
+            try:
+                rows = _write_csv_batches(file_path, temp_path, on_progress)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                rows = None
+
+        if rows is None:
+            df = _read_original(file_path)
+            pq.write_table(_table_from_pandas(df), temp_path, compression=PARQUET_COMPRESSION)
+            rows = len(df)
+            if on_progress:
+                on_progress(rows)
+
+        os.replace(temp_path, parquet_path(dataset))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return rows
+
+
+def materialize_arrow_cache(dataset):
+    """
+    Make sure an ingested dataset has an uncompressed Arrow IPC file in the shared cache and return
+    its path, or None while there is no Parquet sidecar yet. The file is built one row group at a time,
+    written under a temp name and renamed, so concurrent workers can race to create it safely.
+    """
+    path = arrow_cache_path(dataset)
+    if os.path.exists(path):
+        # Cache recency is tracked through mtime
+        os.utime(path)
+        return path
+
+    sidecar = parquet_path(dataset)
+    if not os.path.exists(sidecar):
+        return None
+
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        parquet_file = pq.ParquetFile(sidecar)
+        with pa.ipc.new_file(temp_path, parquet_file.schema_arrow) as writer:
+            for i in range(parquet_file.num_row_groups):
+                writer.write_table(parquet_file.read_row_group(i))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    prune_cache(ARROW_CACHE_FOLDER, ARROW_CACHE_MAX_BYTES, keep=path)
+    return path
+
+
+def _map_arrow_file(path: str) -> pa.Table:
+    # Buffers point into the OS page cache, so every process mapping the file shares one copy
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _read_original_checked(dataset, columns=None) -> pd.DataFrame:
+    file_path = dataset_file_path(dataset)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    return _read_original(file_path, columns)
+
+
+def _select(table: pa.Table, columns) -> pa.Table:
+    if columns is None:
+        return table
+    _check_columns(table.schema.names, columns)
+    return table.select(columns)
+
+
+def open_arrow_table(dataset, columns=None) -> pa.Table:
+    """
+    Return the dataset as an Arrow table memory-mapped zero-copy from the shared cache,
+    optionally projected to `columns`. Datasets that have not been ingested yet are parsed
+    from the original file instead (only the requested columns).
+    """
+    path = materialize_arrow_cache(dataset)
+    if path is None:
+        return _table_from_pandas(_read_original_checked(dataset, columns))
+    return _select(_map_arrow_file(path), columns)
+
+
+def read_dataset(dataset, columns=None) -> pd.DataFrame:
+    """
+    Load a dataset as a DataFrame from the memory-mapped Arrow cache when ingest has produced a
+    sidecar, otherwise by parsing the original file. Raises FileNotFoundError when neither exists.
+    `columns` is pushed down to the reader (Arrow column selection, or usecols for CSV/XLSX), and
+    UnknownColumnsError is raised for names the dataset does not have.
+    With split_blocks, numeric columns without nulls stay views over the shared mapping.
+    """
+    path = materialize_arrow_cache(dataset)
+    if path is None:
+        return _read_original_checked(dataset, columns)
+    return _select(_map_arrow_file(path), columns).to_pandas(split_blocks=True)
+
+
+def dataset_columns(dataset) -> list:
+    """Column names of a dataset, from the Parquet sidecar schema or the original file's header."""
+    sidecar = parquet_path(dataset)
+    if os.path.exists(sidecar):
+        return pq.ParquetFile(sidecar).schema_arrow.names
+    file_path = dataset_file_path(dataset)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    if file_path.lower().endswith(".csv"):
+        return pd.read_csv(file_path, nrows=0).columns.tolist()
+    return pd.read_excel(file_path, nrows=0).columns.tolist()
+
+
+def row_group_count(dataset) -> int:
+    """Row groups of a dataset's Parquet sidecar; 0 before ingest."""
+    sidecar = parquet_path(dataset)
+    return pq.ParquetFile(sidecar).num_row_groups if os.path.exists(sidecar) else 0
+
+
+def estimated_memory_bytes(dataset) -> int:
+    """
+    Rough in-memory size of a dataset: the uncompressed size recorded in the Parquet sidecar,
+    or the size of the original file before ingest.
+    """
+    sidecar = parquet_path(dataset)
+    if os.path.exists(sidecar):
+        metadata = pq.ParquetFile(sidecar).metadata
+        return sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+    file_path = dataset_file_path(dataset)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    return os.path.getsize(file_path)
+
+
+def iter_dataset_chunks(dataset, columns=None, chunk_rows: int = 100_000, row_groups=None):
+    """
+    Yield a dataset as DataFrames of at most `chunk_rows` rows, so memory stays bounded by the chunk
+    size: Parquet sidecar batches after ingest (only `row_groups`, when given), read_csv(chunksize=...)
+    before it. XLSX cannot be read incrementally and arrives as a single frame.
+    """
+    sidecar = parquet_path(dataset)
+    if os.path.exists(sidecar):
+        parquet_file = pq.ParquetFile(sidecar)
+        if columns is not None:
+            _check_columns(parquet_file.schema_arrow.names, columns)
+        if parquet_file.metadata.num_rows == 0:
+            # Still report the columns of an empty dataset
+            yield _select(parquet_file.schema_arrow.empty_table(), columns).to_pandas()
+            return
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, row_groups=row_groups, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    file_path = dataset_file_path(dataset)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    if not file_path.lower().endswith(".csv"):
+        yield _read_original(file_path, columns)
+        return
+
+    if columns is not None:
+        _check_columns(pd.read_csv(file_path, nrows=0).columns, columns)
+    for chunk in pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows):
+        yield chunk[columns] if columns is not None else chunk
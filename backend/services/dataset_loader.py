@@ -0,0 +1,179 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from database import SessionLocal
+from models import Dataset
+from services.dataset_io import UnknownColumnsError, read_dataset, open_arrow_table
+from services.storage import dataset_file_path, parquet_path
+
+# In-process budget for DataFrames built over the shared Arrow mappings; LRU entries are evicted past it
+DATASET_CACHE_BYTES = int(os.getenv("DATASET_CACHE_BYTES", 512 * 1024 * 1024))  # 512 MiB
+
+
+class DatasetCache:
+    """
+    LRU cache of loaded datasets bounded by an approximate memory budget in bytes.
+    Frames are built over memory-mapped Arrow files, so numeric columns are shared with every other
+    worker through the page cache and the budget (which counts them in full) errs on the safe side.
+    Entries are keyed by (dataset id, version, columns) where the version combines the content hash
+    with the mtime of the file being read, so a rewritten sidecar or file is never served stale,
+    and columns is None for the full frame or the tuple of a column projection.
+    Cached frames are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DATASET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (DataFrame, size in bytes)
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> Lock, so concurrent misses on one key parse the file once
+
+    def lookup(self, key):
+        """Return the cached frame for `key` or None (a miss is only counted by get_or_load)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, key, df: pd.DataFrame):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            # Drop older versions of the same dataset before making room
+            for stale in [k for k in self._entries if k[0] == key[0] and k[1] != key[1]]:
+                self.current_bytes -= self._entries.pop(stale)[1]
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+
+    def get_or_load(self, key, loader) -> pd.DataFrame:
+        df = self.lookup(key)
+        if df is not None:
+            return df
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another request may have loaded it while we waited
+            df = self.lookup(key)
+            if df is not None:
+                return df
+            with self._lock:
+                self.misses += 1
+            try:
+                df = loader()
+                self._store(key, df)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+_cache = DatasetCache()
+
+
+def _dataset_version(dataset):
+    source = parquet_path(dataset)
+    if not os.path.exists(source):
+        source = dataset_file_path(dataset)
+    mtime = os.path.getmtime(source) if os.path.exists(source) else None
+    return dataset.content_hash, mtime
+
+
+def fetch_dataset(dataset_id: int, db=None) -> Dataset:
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        dataset = db.get(Dataset, dataset_id)
+    finally:
+        if own_session:
+            db.close()
+    if dataset is None:
+        raise LookupError(f"Dataset {dataset_id} not found")
+    return dataset
+
+
+def load_dataset(dataset_id: int, columns=None, db=None) -> pd.DataFrame:
+    """
+    Return a dataset as a DataFrame through the in-process cache (API process only; workers use read_uncached).
+    `columns` selects a subset of columns; `db` lets callers reuse their request session.
+    Raises LookupError for unknown datasets, FileNotFoundError when the file is gone and
+    UnknownColumnsError when `columns` names columns the dataset does not have.
+    """
+    dataset = fetch_dataset(dataset_id, db)
+    version = _dataset_version(dataset)
+
+    if columns is None:
+        return _cache.get_or_load((dataset.id, version, None), lambda: read_dataset(dataset))
+
+    # Slice an already cached full frame; otherwise push the projection down to the reader
+    columns = list(dict.fromkeys(columns))
+    full = _cache.lookup((dataset.id, version, None))
+    if full is not None:
+        missing = [c for c in columns if c not in full.columns]
+        if missing:
+            raise UnknownColumnsError(missing)
+        return full[columns]
+    return _cache.get_or_load((dataset.id, version, tuple(columns)), lambda: read_dataset(dataset, columns))
+
+
+def read_uncached(dataset_id: int, columns=None, db=None) -> pd.DataFrame:
+    """
+    Like load_dataset but bypassing the in-process cache, for compute-pool and job workers: their
+    results are cached by content hash already, and a frame cached in every worker would hold its own
+    copy of the string columns, so memory would grow with the number of workers. The LRU is for the API process.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+    return read_dataset(fetch_dataset(dataset_id, db), columns)
+
+
+def load_table(dataset_id: int, columns=None, db=None):
+    """
+    Return a dataset as a pyarrow Table memory-mapped from the shared Arrow cache (no pandas conversion).
+    Mapping an already cached file is cheap, so tables are not kept in the in-process LRU.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+    return open_arrow_table(fetch_dataset(dataset_id, db), columns)
+
+
+def parse_columns(value):
+    """Split a comma-separated query parameter (`columns`, `metrics`); None or blank means all."""
+    if value is None:
+        return None
+    columns = [c.strip() for c in value.split(",") if c.strip()]
+    return columns or None
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,52 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+
+# Dedicated processes for CPU-bound pandas work, so it neither holds the GIL of the API process
+# nor occupies Starlette's threadpool that serves the lightweight endpoints
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+
+_executor = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=COMPUTE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_compute(func, *args, **kwargs):
+    """
+    Run `func(*args, **kwargs)` in the compute pool and await its result.
+    `func` must be a module-level function; workers read datasets themselves from the
+    memory-mapped Arrow cache, so only ids go in and compact results come back.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def table_to_ipc(table: pa.Table) -> bytes:
+    """Serialize a result table as an Arrow IPC stream for the trip back to the API process."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def ipc_to_table(data: bytes) -> pa.Table:
+    return pa.ipc.open_stream(data).read_all()
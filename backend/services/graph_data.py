@@ -0,0 +1,342 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# raw: every value; histogram: bin edges and counts; box: five-number summaries;
+# line: downsampled series; counts: value counts of categorical columns (all but raw computed on the server)
+GRAPH_KINDS = ("raw", "histogram", "box", "line", "counts")
+# lttb: Largest-Triangle-Three-Buckets; minmax: lowest and highest point of every bucket
+LINE_DOWNSAMPLERS = ("lttb", "minmax")
+
+# Media type of an Arrow IPC stream; clients that accept it get /graphs data without JSON encoding
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Arrow schema of the summaries of each kind (fields as in the response models of routers/graphs.py),
+# fixed so that types do not depend on the values (e.g. no null-typed columns when every group is None)
+SUMMARY_SCHEMAS = {
+    "histogram": pa.schema([
+        ("column_name", pa.string()),
+        ("edges", pa.list_(pa.float64())),
+        ("counts", pa.list_(pa.int64())),
+    ]),
+    "box": pa.schema([
+        ("column_name", pa.string()),
+        ("group", pa.string()),
+        ("count", pa.int64()),
+        ("mean", pa.float64()),
+        ("min", pa.float64()),
+        ("q1", pa.float64()),
+        ("median", pa.float64()),
+        ("q3", pa.float64()),
+        ("max", pa.float64()),
+        ("whisker_low", pa.float64()),
+        ("whisker_high", pa.float64()),
+        ("outlier_count", pa.int64()),
+        ("outliers", pa.list_(pa.float64())),
+    ]),
+    "line": pa.schema([
+        ("column_name", pa.string()),
+        ("x", pa.list_(pa.int64())),
+        ("y", pa.list_(pa.float64())),
+        ("total_points", pa.int64()),
+    ]),
+    "counts": pa.schema([
+        ("column_name", pa.string()),
+        ("values", pa.list_(pa.string())),
+        ("counts", pa.list_(pa.int64())),
+        ("other_count", pa.int64()),
+        ("distinct_count", pa.int64()),
+    ]),
+}
+
+# Named rules accepted by np.histogram for choosing the bin width
+HISTOGRAM_BIN_RULES = ("auto", "fd", "doane", "scott", "stone", "rice", "sturges", "sqrt")
+# Rules whose bin width follows the spread (IQR or std) rather than the range, so their bin count is unbounded;
+# their count is worked out here and capped before numpy allocates any edges
+SPREAD_BIN_RULES = ("auto", "fd", "scott")
+# Upper bound on bins per histogram, whatever a rule or the request asks for
+MAX_HISTOGRAM_BINS = int(os.getenv("MAX_HISTOGRAM_BINS", 1000))
+# Outliers listed per box (evenly spread over the sorted outliers, extremes included); all are counted
+MAX_BOX_OUTLIERS = int(os.getenv("MAX_BOX_OUTLIERS", 100))
+# Groups per box plot when grouping by a column; the most frequent ones are kept
+MAX_BOX_GROUPS = int(os.getenv("MAX_BOX_GROUPS", 50))
+# Points per line plot when the request gives no max_points
+LINE_MAX_POINTS = int(os.getenv("LINE_MAX_POINTS", 2000))
+# Bars per categorical column when the request gives no top_n; the rest are summed into "other"
+COUNTS_TOP_N = int(os.getenv("COUNTS_TOP_N", 20))
+
+
+def parse_bins(value: str):
+    """A `bins` query parameter: a positive bin count or the name of a numpy bin rule."""
+    if value in HISTOGRAM_BIN_RULES:
+        return value
+    try:
+        bins = int(value)
+    except ValueError:
+        raise ValueError(f"bins must be a positive integer or one of: {', '.join(HISTOGRAM_BIN_RULES)}")
+    if bins < 1:
+        raise ValueError("bins must be a positive integer")
+    return bins
+
+
+def _spread_rule_bin_count(values: np.ndarray, rule: str, value_range) -> int:
+    """
+    Number of bins np.histogram_bin_edges would choose for a SPREAD_BIN_RULES rule, from the bin widths
+    numpy documents (fd: 2 IQR n^(-1/3); scott: (24 sqrt(pi) / n)^(1/3) std; auto: the smaller of sturges
+    and fd relaxed to at least half the sqrt width), so a huge count can be capped before any edge is allocated.
+    """
+    if value_range is not None:
+        first, last = value_range
+        values = values[(values >= first) & (values <= last)]
+    elif len(values):
+        first, last = float(values.min()), float(values.max())
+    n = len(values)
+    if not n or first == last:
+        return 1
+    q75, q25 = np.percentile(values, [75, 25])
+    fd = 2.0 * (q75 - q25) * n ** (-1 / 3)
+    if rule == "fd":
+        width = fd
+    elif rule == "scott":
+        width = (24.0 * np.pi ** 0.5 / n) ** (1 / 3) * np.std(values)
+    else:
+        spread = float(values.max() - values.min())
+        width = min(max(fd, spread / np.sqrt(n) / 2), spread / (np.log2(n) + 1.0))
+    return int(np.ceil((last - first) / width)) if width else 1
+
+
+def histogram(values: np.ndarray, bins="auto", range_min: float = None, range_max: float = None):
+    """
+    Bin edges and counts of the finite `values` (np.histogram). A missing range bound defaults to
+    the data's minimum or maximum, and values outside the range are not counted. Rules that would
+    produce more than MAX_HISTOGRAM_BINS bins (e.g. fd on data with a tiny IQR and a far outlier)
+    are capped before the edges are built.
+    """
+    values = values[np.isfinite(values)]
+    if range_min is not None or range_max is not None:
+        low = range_min if range_min is not None else (values.min() if len(values) else 0.0)
+        high = range_max if range_max is not None else (values.max() if len(values) else low + 1.0)
+        if low > high:
+            raise ValueError("range_min must not exceed range_max")
+        value_range = (float(low), float(high))
+    else:
+        value_range = None
+
+    if isinstance(bins, int):
+        bins = min(bins, MAX_HISTOGRAM_BINS)
+    elif bins in SPREAD_BIN_RULES:
+        # Same edges numpy would build for the rule: an equal-width split of the range into that many bins
+        bins = min(_spread_rule_bin_count(values, bins, value_range), MAX_HISTOGRAM_BINS)
+    edges = np.histogram_bin_edges(values, bins, value_range)
+    if len(edges) - 1 > MAX_HISTOGRAM_BINS:
+        # The other rules grow with the row count only (at most ~sqrt(n) bins), so building their edges is safe
+        edges = np.histogram_bin_edges(values, MAX_HISTOGRAM_BINS, value_range)
+    counts, edges = np.histogram(values, edges)
+    return edges.tolist(), counts.tolist()
+
+
+def _box_summary(v: np.ndarray, max_outliers: int) -> dict:
+    """Summary of already sorted finite values, with Tukey whiskers at 1.5 IQR beyond the quartiles."""
+    if not len(v):
+        return {"count": 0, "outlier_count": 0, "outliers": []}
+    q1, median, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    low = np.searchsorted(v, q1 - 1.5 * iqr, side="left")
+    high = np.searchsorted(v, q3 + 1.5 * iqr, side="right")
+    outliers = np.concatenate([v[:low], v[high:]])
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(np.int64)]
+    return {
+        "count": len(v),
+        "mean": float(v.mean()),
+        "min": float(v[0]),
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "max": float(v[-1]),
+        "whisker_low": float(v[low]),
+        "whisker_high": float(v[high - 1]),
+        "outlier_count": int(low + len(v) - high),
+        "outliers": outliers.tolist(),
+    }
+
+
+def _text_labels(values: pd.Series) -> pd.Series:
+    """
+    Object columns as text (missing values kept), so values that print the same are one label:
+    pd.factorize would otherwise tell 1 and '1' apart and show them as two bars or boxes named "1".
+    """
+    if values.dtype != object:
+        return values
+    return values.where(values.isna(), values.astype(str))
+
+
+def box_summaries(values: np.ndarray, groups: pd.Series = None, max_outliers: int = MAX_BOX_OUTLIERS,
+                  max_groups: int = MAX_BOX_GROUPS):
+    """
+    Box-plot summaries of the finite `values` as (group label, summary) pairs: one pair with label
+    None, or with `groups` (one label per value; missing labels are skipped) one per group for the
+    `max_groups` most frequent groups, most frequent first. Grouped values are ordered with a single
+    lexsort by (group, value) and each group is summarised from its slice.
+    """
+    if groups is None:
+        return [(None, _box_summary(np.sort(values[np.isfinite(values)]), max_outliers))]
+
+    codes, labels = pd.factorize(_text_labels(groups))
+    keep = np.isfinite(values) & (codes >= 0)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    top = np.argsort(-counts, kind="stable")[:max_groups]
+
+    values, codes = values[keep], codes[keep]
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    starts = np.searchsorted(codes, top, side="left")
+    ends = np.searchsorted(codes, top, side="right")
+    return [
+        (str(labels[code]), _box_summary(values[start:end], max_outliers))
+        for code, start, end in zip(top, starts, ends)
+    ]
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices kept by Largest-Triangle-Three-Buckets: the first and last points, and from each of
+    max_points - 2 equal buckets the point forming the largest triangle with the point kept from the
+    previous bucket and the mean of the next one. The bucket means are computed for all buckets at once
+    (cumulative sums); only the choice of the kept point walks the buckets, each step one vectorized argmax.
+    """
+    n = len(x)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    cum_x = np.concatenate([[0.0], np.cumsum(x)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    mean_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / sizes
+    mean_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / sizes
+    # The bucket after the last one is the fixed last point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for b in range(max_points - 2):
+        start, end = edges[b], edges[b + 1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - next_x[b]) * (by - y[a]) - (x[a] - bx) * (next_y[b] - y[a]))
+        a = start + int(np.argmax(area))
+        kept[b + 1] = a
+    return kept
+
+
+def _minmax(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the lowest and highest point of max_points // 2 equal buckets, in order. The series is
+    padded with NaN to a whole number of buckets and reshaped, so one nanargmin/nanargmax covers all buckets.
+    """
+    n = len(y)
+    size = -(-n // max(max_points // 2, 1))
+    buckets = -(-n // size)
+    Y = np.full(buckets * size, np.nan)
+    Y[:n] = y
+    Y = Y.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    return np.unique(np.concatenate([offsets + np.nanargmin(Y, axis=1), offsets + np.nanargmax(Y, axis=1)]))
+
+
+def downsample_line(values: np.ndarray, max_points: int = LINE_MAX_POINTS, method: str = "lttb"):
+    """
+    The finite `values` as (row positions, values, count of finite values), reduced to at most
+    `max_points` points that keep the visual shape of the line. Series that already fit are returned whole.
+    """
+    x = np.flatnonzero(np.isfinite(values))
+    y = values[x]
+    total = len(x)
+    if total > max_points:
+        kept = _lttb(x.astype(np.float64), y, max_points) if method == "lttb" else _minmax(y, max_points)
+        x, y = x[kept], y[kept]
+    return x.tolist(), y.tolist(), total
+
+
+def value_counts(values: pd.Series, top_n: int = COUNTS_TOP_N):
+    """
+    The `top_n` most frequent values of a column as (values, counts, other count, distinct count),
+    most frequent first (ties in order of first appearance). Values are mapped to integer codes
+    (pd.factorize, or the codes of a categorical column) and counted with one np.bincount,
+    so the cost is linear in the rows whatever the cardinality. Missing values are not counted.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(_text_labels(values))
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    present = np.flatnonzero(counts)
+    top = present[np.argsort(-counts[present], kind="stable")[:top_n]]
+    other = int(counts.sum() - counts[top].sum())
+    return [str(labels[code]) for code in top], counts[top].tolist(), other, len(present)
+
+
+def _accept_match(accept: str, media_type: str):
+    """
+    The most specific media range of an Accept header matching `media_type` as (specificity, q):
+    specificity 2 for type/subtype, 1 for type/*, 0 for */*, and (-1, 0.0) when none matches.
+    Ranges with a malformed q are ignored.
+    """
+    main_type = media_type.split("/")[0]
+    best_specificity, quality = -1, 0.0
+    for media_range in accept.split(","):
+        name, *params = [part.strip() for part in media_range.split(";")]
+        name = name.lower()
+        specificity = {media_type: 2, f"{main_type}/*": 1, "*/*": 0}.get(name)
+        if specificity is None or specificity < best_specificity:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is None or not 0 <= q <= 1:
+            continue
+        best_specificity, quality = specificity, q
+    return best_specificity, quality
+
+
+def wants_arrow(accept: str) -> bool:
+    """
+    Whether an Accept header asks for an Arrow IPC stream: Arrow must be named explicitly with q > 0
+    and rank at least as high as JSON. Wildcards alone (e.g. */*) keep the JSON default.
+    """
+    if not accept:
+        return False
+    specificity, arrow = _accept_match(accept, ARROW_STREAM_MEDIA_TYPE)
+    return specificity == 2 and arrow > 0 and arrow >= _accept_match(accept, "application/json")[1]
+
+
+def raw_graph_table(table: pa.Table) -> pa.Table:
+    """
+    The columns of kind=raw as Arrow: numeric columns as they are, text and dictionary columns as
+    strings. The buffers are the dataset's own (no per-value Python objects); unlike the JSON form
+    the columns stay row-aligned, with missing values as nulls instead of dropped.
+    """
+    columns, names = [], []
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            columns.append(column)
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            columns.append(column)
+        elif pa.types.is_dictionary(field.type):
+            columns.append(pc.cast(column, pa.string()))
+        else:
+            continue
+        names.append(field.name)
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def summaries_table(kind: str, items) -> pa.Table:
+    """One row per summary model of a kind (histogram, box, line or counts) with that kind's SUMMARY_SCHEMAS schema."""
+    return pa.Table.from_pylist([item.model_dump() for item in items], schema=SUMMARY_SCHEMAS[kind])
@@ -0,0 +1,42 @@
+from database import SessionLocal
+from models import Dataset
+from services.dataset_io import write_parquet_sidecar
+from services.jobs import job_handler
+
+
+@job_handler("ingest")
+def ingest_dataset(payload: dict) -> dict:
+    """
+    Parse an uploaded file in the background into its Parquet sidecar.
+    Moves Dataset.status through Parsing -> Processed (or Error) and updates processed_rows as batches are written.
+    """
+    db = SessionLocal()
+    try:
+        dataset = db.query(Dataset).filter(Dataset.id == payload["dataset_id"]).first()
+        if not dataset:
+            raise ValueError(f"Dataset {payload['dataset_id']} not found")
+
+        dataset.status = "Parsing"
+        dataset.processed_rows = 0
+        db.commit()
+
+        def report_progress(rows: int):
+            dataset.processed_rows = rows
+            db.commit()
+
+        try:
+            write_parquet_sidecar(dataset, on_progress=report_progress)
+        except Exception:
+            db.rollback()
+            dataset.status = "Error"
+            db.commit()
+            raise
+
+        # The parsed count is authoritative over the estimate taken at upload time
+        dataset.total_rows = dataset.processed_rows
+        dataset.status = "Processed"
+        db.commit()
+
+        return {"dataset_id": dataset.id, "processed_rows": dataset.processed_rows}
+    finally:
+        db.close()
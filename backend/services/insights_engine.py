@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from services.dataset_loader import read_uncached
+from services.executor import table_to_ipc
+from services.sketches import HyperLogLog, SpaceSaving
+
+# Bump whenever the metric set or a formula changes, so cached insights get recomputed
+ENGINE_VERSION = "4"
+
+# Most frequent values reported per categorical column (top_1..top_k and their counts)
+INSIGHTS_TOP_K = int(os.getenv("INSIGHTS_TOP_K", 5))
+
+# Order of the values in every insight row, and of the columns of the IPC result table
+INSIGHT_FIELDS = ("column_name", "metric_name", "metric_value", "metric_value_num", "metric_error")
+
+QUANTILES = np.array([0.25, 0.5, 0.75, 1.0])
+QUANTILE_NAMES = ["Q1", "Q2 (Median)", "Q3", "Q4 (Max)"]
+
+
+def metric_row(col, name: str, value: float, text: str = None, error: float = None):
+    """
+    An insight row: the text form (same as the per-column pandas version stored), the float and,
+    for approximate metrics, its error bound (None means exact).
+    """
+    value = float(value)
+    if np.isnan(value):
+        return col, name, text or "nan", None, error
+    return col, name, text or str(value), value, error
+
+
+def mode_text(value, kind: str) -> str:
+    if np.isnan(value):
+        return "None"
+    if kind == "b":
+        return str(bool(value))
+    if kind in "iu":
+        return str(int(value))
+    return str(float(value))
+
+
+def categorical_rows(col, distinct, top: SpaceSaving, top_k: int = INSIGHTS_TOP_K):
+    """
+    Insight rows of a non-numeric column: distinct_count and, per rank i, top_i (the value) and
+    top_i_count (its frequency, with the summary's error bound when not exact). `distinct` is the
+    exact count when the whole column was counted at once, or a HyperLogLog for streamed columns,
+    whose estimate is used once the top-k summary has overflowed.
+    """
+    exact = top.exact_distinct() if isinstance(distinct, HyperLogLog) else distinct
+    if exact is not None:
+        rows = [metric_row(col, "distinct_count", exact, str(exact))]
+    else:
+        estimate = round(distinct.estimate())
+        rows = [metric_row(col, "distinct_count", estimate, str(estimate), error=distinct.error() + top.unseen)]
+
+    for rank, (value, count, error) in enumerate(top.top(top_k), start=1):
+        rows.append((col, f"top_{rank}", str(value)[:255], None, None))
+        rows.append(metric_row(col, f"top_{rank}_count", count, str(int(count)), error=float(error) if error else None))
+    return rows
+
+
+def profile_categorical(values):
+    """Count the non-missing values of a Series exactly: (distinct count, SpaceSaving of the most frequent)."""
+    top = SpaceSaving()
+    top.update(values)
+    return int(values.nunique()), top
+
+
+def moment_stats(n: np.ndarray, m2: np.ndarray, m3: np.ndarray, m4: np.ndarray):
+    """Sample std, skewness and excess kurtosis (pandas' bias-corrected forms) from central moment sums."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+
+        # Skewness: adjusted Fisher-Pearson coefficient
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * (m3 / n) / (m2 / n) ** 1.5
+        skew = np.where(n < 3, np.nan, np.where(m2 == 0, 0.0, skew))
+
+        # Kurtosis: bias-corrected excess kurtosis
+        adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        kurt = n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 * m2) - adj
+        kurt = np.where(n < 4, np.nan, np.where(m2 == 0, 0.0, kurt))
+
+    return std, skew, kurt
+
+
+def column_moments(X: np.ndarray, valid: np.ndarray):
+    """Per-column count, mean, sample std, skewness and excess kurtosis."""
+    n = valid.sum(axis=0).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, X, 0.0).sum(axis=0) / n
+        dev = np.where(valid, X - mean, 0.0)
+        dev2 = dev * dev
+        m2 = dev2.sum(axis=0)
+        m3 = (dev2 * dev).sum(axis=0)
+        m4 = (dev2 * dev2).sum(axis=0)
+
+    return (n, mean) + moment_stats(n, m2, m3, m4)
+
+
+def _sorted_quantiles(S: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Linear-interpolated quantiles (pandas' default) read off columns sorted with NaNs last."""
+    cols = np.arange(S.shape[1])
+    pos = QUANTILES[:, None] * np.maximum(n - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    lower = S[lo, cols]
+    upper = S[hi, cols]
+    with np.errstate(invalid="ignore"):
+        result = lower + (upper - lower) * (pos - lo)
+    result[:, n == 0] = np.nan
+    return result
+
+
+def _sorted_modes(S: np.ndarray, valid_sorted: np.ndarray) -> np.ndarray:
+    """Smallest most frequent value per column, from run lengths of the sorted columns."""
+    rows, cols = S.shape
+    idx = np.arange(rows)[:, None]
+    run_start = np.ones(S.shape, dtype=bool)
+    run_start[1:] = S[1:] != S[:-1]
+    start_idx = np.maximum.accumulate(np.where(run_start, idx, 0), axis=0)
+    run_len = np.where(valid_sorted, idx - start_idx + 1, 0)
+    # argmax returns the first maximal run end, i.e. the smallest value among ties (like pandas)
+    best = run_len.argmax(axis=0)
+    modes = S[best, np.arange(cols)]
+    modes[~valid_sorted.any(axis=0)] = np.nan
+    return modes
+
+
+def compute_insights(df: pd.DataFrame):
+    """
+    Return insight rows (see INSIGHT_FIELDS) for every column of `df`.
+    Non-numeric columns are profiled with a distinct count and their most frequent values.
+    All numeric columns are profiled together as one 2-D float matrix: a single sort feeds the
+    quartiles and the mode, and the moments come from column-wise sums, so the cost no longer
+    grows with one pandas call per column and metric.
+    """
+    missing = df.isna().sum().to_numpy()
+    columns = df.columns.tolist()
+    dtypes = df.dtypes.tolist()
+    numeric_idx = [i for i, dtype in enumerate(dtypes) if pd.api.types.is_numeric_dtype(dtype)]
+    positions = {i: j for j, i in enumerate(numeric_idx)}
+
+    if numeric_idx and len(df):
+        X = df.iloc[:, numeric_idx].to_numpy(dtype=np.float64, na_value=np.nan)
+        n, mean, std, skew, kurt = column_moments(X, ~np.isnan(X))
+
+        S = np.sort(X, axis=0)  # NaNs sort last
+        quartiles = _sorted_quantiles(S, n)
+        modes = _sorted_modes(S, ~np.isnan(S))
+    else:
+        mean = std = skew = kurt = modes = np.full(len(numeric_idx), np.nan)
+        quartiles = np.full((len(QUANTILES), len(numeric_idx)), np.nan)
+
+    insights = []
+    for i, col in enumerate(columns):
+        insights.append(metric_row(col, "missing_count", missing[i], str(int(missing[i]))))
+
+        if i not in positions:
+            values = df.iloc[:, i]
+            insights.extend(categorical_rows(col, *profile_categorical(values[values.notna()])))
+            continue
+        j = positions[i]
+        insights.append(metric_row(col, "mean", mean[j]))
+        insights.append(metric_row(col, "std_dev", std[j]))
+        for q_name, q_val in zip(QUANTILE_NAMES, quartiles[:, j]):
+            insights.append(metric_row(col, q_name, q_val))
+        insights.append(metric_row(col, "mode", modes[j], mode_text(modes[j], dtypes[i].kind)))
+        insights.append(metric_row(col, "skewness", skew[j]))
+        insights.append(metric_row(col, "kurtosis", kurt[j]))
+
+    return insights
+
+
+def insights_to_ipc(rows, metadata: dict = None) -> bytes:
+    """
+    Pack insight rows into an Arrow IPC stream with one column per INSIGHT_FIELDS entry;
+    `metadata` (e.g. the sample size) travels as string schema metadata.
+    """
+    table = pa.table({
+        "column_name": pa.array([str(r[0]) for r in rows], pa.string()),
+        "metric_name": pa.array([r[1] for r in rows], pa.string()),
+        "metric_value": pa.array([r[2] for r in rows], pa.string()),
+        "metric_value_num": pa.array([r[3] for r in rows], pa.float64()),
+        "metric_error": pa.array([r[4] for r in rows], pa.float64()),
+    })
+    if metadata:
+        table = table.replace_schema_metadata({key: str(value) for key, value in metadata.items()})
+    return table_to_ipc(table)
+
+
+def insights_task(dataset_id: int, columns=None) -> bytes:
+    """
+    Compute-pool entry point: read the dataset from the shared Arrow cache, compute its insights and
+    return them as an Arrow IPC stream.
+    """
+    return insights_to_ipc(compute_insights(read_uncached(dataset_id, columns=columns)))
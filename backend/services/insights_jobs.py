@@ -0,0 +1,37 @@
+from database import SessionLocal
+from models import Dataset
+from services.dataset_loader import read_uncached
+from services.insights_engine import compute_insights
+from services.insights_store import collect_insight_snapshots, replace_insights
+from services.jobs import job_handler
+
+
+@job_handler("insights")
+def recompute_insights(payload: dict) -> dict:
+    """
+    Exact insights computed in the background, typically after an approx answer was served.
+    Payload: dataset_id and optional columns. The stored rows are replaced when done.
+    """
+    db = SessionLocal()
+    try:
+        dataset = db.get(Dataset, payload["dataset_id"])
+        if not dataset:
+            raise ValueError(f"Dataset {payload['dataset_id']} not found")
+
+        columns = payload.get("columns")
+        rows = compute_insights(read_uncached(dataset.id, columns=columns, db=db))
+        count = replace_insights(db, dataset, rows, columns, mode="exact")
+        return {"dataset_id": dataset.id, "insights_count": count}
+    finally:
+        db.close()
+
+
+@job_handler("insights_gc")
+def collect_old_insights(payload: dict) -> dict:
+    """Delete the insight snapshots a dataset no longer points to. Payload: dataset_id."""
+    db = SessionLocal()
+    try:
+        deleted = collect_insight_snapshots(db, payload["dataset_id"])
+        return {"dataset_id": payload["dataset_id"], "deleted_rows": deleted}
+    finally:
+        db.close()
@@ -0,0 +1,69 @@
+import asyncio
+import math
+import os
+
+import pyarrow as pa
+from fastapi.concurrency import run_in_threadpool
+
+from services.dataset_io import UnknownColumnsError, dataset_columns
+from services.executor import COMPUTE_WORKERS, ipc_to_table, run_compute
+from services.insights_engine import insights_task
+from services.insights_sample import approx_insights_task
+from services.insights_stream import merged_insights, row_group_parts, stream_insights_task, stream_profile_task
+
+# Column blocks computed in parallel for one request (capped by the compute pool size)
+INSIGHTS_WORKERS = int(os.getenv("INSIGHTS_WORKERS", COMPUTE_WORKERS))
+# Narrower datasets are not split: per-block process overhead would outweigh the gain
+INSIGHTS_BLOCK_MIN_COLUMNS = int(os.getenv("INSIGHTS_BLOCK_MIN_COLUMNS", 64))
+
+# exact: in memory; stream: chunked sketches; approx: sampled rows; auto: exact or stream by size
+INSIGHT_MODES = ("auto", "exact", "stream", "approx")
+
+
+def column_blocks(columns, workers: int = INSIGHTS_WORKERS, min_columns: int = INSIGHTS_BLOCK_MIN_COLUMNS):
+    """Split `columns` into at most `workers` contiguous blocks of at least `min_columns` columns."""
+    columns = list(dict.fromkeys(columns))
+    blocks = max(1, min(workers, len(columns) // max(min_columns, 1)))
+    size = max(1, math.ceil(len(columns) / blocks))
+    return [columns[i:i + size] for i in range(0, len(columns), size)] or [columns]
+
+
+async def run_insights(dataset, selected_columns=None, mode: str = "exact", sample=None, stratify=None) -> pa.Table:
+    """
+    Compute a dataset's insights in the compute pool and return them as a table of insight rows.
+    Wide datasets are split into column blocks that run in parallel worker processes; every worker
+    maps only its own columns from the shared Arrow cache (or streams them in stream mode) and the
+    blocks are concatenated back in column order. Stream mode over a Parquet sidecar with several
+    row groups splits the rows instead and merges the per-range profiles. Approx mode samples the
+    rows in a single task, so all columns describe the same sample.
+    """
+    if mode == "approx":
+        return ipc_to_table(await run_compute(approx_insights_task, dataset.id, selected_columns, sample, stratify))
+
+    if mode == "stream":
+        parts = await run_in_threadpool(row_group_parts, dataset, INSIGHTS_WORKERS)
+        if len(parts) > 1:
+            # Row ranges are profiled in parallel and their mergeable sketches folded into one profile
+            profiles = await asyncio.gather(
+                *(run_compute(stream_profile_task, dataset.id, selected_columns, part) for part in parts)
+            )
+            return ipc_to_table(await run_in_threadpool(merged_insights, profiles))
+
+    task = stream_insights_task if mode == "stream" else insights_task
+
+    columns = selected_columns
+    if columns is None:
+        columns = await run_in_threadpool(dataset_columns, dataset)
+    blocks = column_blocks(columns)
+    if len(blocks) == 1:
+        return ipc_to_table(await run_compute(task, dataset.id, selected_columns))
+
+    if selected_columns is not None:
+        # Validate up front so the error names every unknown column, not just one block's
+        available = set(await run_in_threadpool(dataset_columns, dataset))
+        missing = [c for c in selected_columns if c not in available]
+        if missing:
+            raise UnknownColumnsError(missing)
+
+    results = await asyncio.gather(*(run_compute(task, dataset.id, block) for block in blocks))
+    return pa.concat_tables([ipc_to_table(result) for result in results])
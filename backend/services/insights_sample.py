@@ -0,0 +1,211 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from services.dataset_io import UnknownColumnsError
+from services.dataset_loader import load_table
+from services.insights_engine import QUANTILES, QUANTILE_NAMES, column_moments, compute_insights, insights_to_ipc
+
+# Rows profiled by mode=approx when the request gives no sample
+INSIGHTS_SAMPLE_ROWS = int(os.getenv("INSIGHTS_SAMPLE_ROWS", 100_000))
+# Two-sided normal quantile of the reported confidence intervals (1.96 = 95%)
+CONFIDENCE_Z = float(os.getenv("INSIGHTS_CONFIDENCE_Z", 1.96))
+# Random sub-samples whose spread gives the standard errors of std, skewness and kurtosis
+CONFIDENCE_BATCHES = 10
+
+
+def sample_size(total: int, sample=None) -> int:
+    """`sample` is a fraction of the rows when <= 1, a row count otherwise (default INSIGHTS_SAMPLE_ROWS)."""
+    if sample is None:
+        size = INSIGHTS_SAMPLE_ROWS
+    elif sample <= 1:
+        size = math.ceil(total * sample)
+    else:
+        size = int(sample)
+    return min(max(size, 1), total)
+
+
+def sample_indices(total: int, size: int, strata=None, seed=None) -> np.ndarray:
+    """
+    Sorted row positions of a uniform sample without replacement, or of a proportionally
+    allocated stratified one when `strata` (one label per row) is given; every stratum keeps at least one row.
+    """
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        return np.sort(rng.choice(total, size, replace=False))
+
+    codes, _ = pd.factorize(strata, use_na_sentinel=False)
+    counts = np.bincount(codes)
+    allocation = np.minimum(np.maximum(np.round(size * counts / total), 1), counts).astype(np.int64)
+    order = np.argsort(codes, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    picks = [
+        rng.choice(order[start:start + count], take, replace=False)
+        for start, count, take in zip(starts, counts, allocation)
+    ]
+    return np.sort(np.concatenate(picks))
+
+
+def _batch_standard_errors(X: np.ndarray, seed=None):
+    """
+    Standard errors of std, skewness and kurtosis from batch means: the sample is split at random
+    into CONFIDENCE_BATCHES parts and the spread of the per-part estimates is scaled down by
+    sqrt(batches). Unlike the normal-theory sqrt(6/n) / sqrt(24/n) it holds for skewed data too.
+    """
+    parts = np.array_split(X[np.random.default_rng(seed).permutation(len(X))], CONFIDENCE_BATCHES)
+    estimates = np.array([column_moments(part, ~np.isnan(part))[2:] for part in parts])
+    with np.errstate(invalid="ignore"):
+        return np.nanstd(estimates, axis=0, ddof=1) / math.sqrt(CONFIDENCE_BATCHES)
+
+
+def _categorical_estimates(df: pd.DataFrame, rows, full: pa.Table) -> dict:
+    """
+    Population estimates of the categorical metrics from the sample, keyed by (column, metric):
+    top-value counts scaled to the full data with the binomial interval of their share, and the
+    distinct count from the GEE estimator (sqrt(N/n) * singletons + the rest), whose ratio error
+    is at most sqrt(N/n).
+    """
+    z = CONFIDENCE_Z
+    counts = {(r[0], r[1]): r[3] for r in rows}
+    estimates = {}
+    for i, dtype in enumerate(df.dtypes.tolist()):
+        if pd.api.types.is_numeric_dtype(dtype):
+            continue
+        col = df.columns[i]
+        values = df.iloc[:, i]
+        frequencies = values[values.notna()].value_counts()
+        sampled = int(frequencies.sum())
+        population = full.num_rows - full.column(col).null_count
+        if not sampled:
+            continue
+
+        scale = population / sampled
+        singletons = int((frequencies == 1).sum())
+        distinct = int(round(min(np.sqrt(scale) * singletons + len(frequencies) - singletons, population)))
+        estimates[(col, "distinct_count")] = (str(distinct), float(distinct), float(distinct * (np.sqrt(scale) - 1)))
+
+        rank = 1
+        while (col, f"top_{rank}_count") in counts:
+            share = counts[(col, f"top_{rank}_count")] / sampled
+            count = int(round(share * population))
+            error = z * np.sqrt(share * (1 - share) / sampled) * population
+            estimates[(col, f"top_{rank}_count")] = (str(count), float(count), float(error))
+            rank += 1
+    return estimates
+
+
+def _student_t(z: float, dof: int) -> float:
+    """Student t quantile matching the normal quantile `z` (Cornish-Fisher expansion, no scipy needed)."""
+    return z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+
+
+def _confidence_errors(df: pd.DataFrame, rows, population: int, seed=None) -> dict:
+    """
+    Half-widths of the confidence intervals of the sampled metrics, keyed by (column, metric):
+    the normal interval of the mean, batch-means intervals for std, skewness and kurtosis (both
+    with finite population correction where it applies), distribution-free order-statistic
+    intervals for the quartiles and, for the mode, the interval of its frequency scaled to the full data.
+    """
+    z = CONFIDENCE_Z
+    columns = df.columns.tolist()
+    numeric_idx = [i for i, dtype in enumerate(df.dtypes.tolist()) if pd.api.types.is_numeric_dtype(dtype)]
+    if not numeric_idx or not len(df):
+        return {}
+
+    values = {(r[0], r[1]): r[3] for r in rows}
+    X = df.iloc[:, numeric_idx].to_numpy(dtype=np.float64, na_value=np.nan)
+    n = (~np.isnan(X)).sum(axis=0).astype(np.float64)
+    S = np.sort(X, axis=0)
+    cols = np.arange(X.shape[1])
+    fpc = math.sqrt(max(population - len(df), 0) / max(population - 1, 1))
+    std_se, skew_se, kurt_se = _batch_standard_errors(X, seed)
+    # Only CONFIDENCE_BATCHES estimates behind each batch-means error, hence t instead of z
+    t = _student_t(z, CONFIDENCE_BATCHES - 1)
+
+    errors = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        quartile_bounds = []
+        for q in QUANTILES[:-1]:
+            half = z * np.sqrt(n * q * (1 - q))
+            last = np.maximum(n - 1, 0).astype(np.int64)
+            lower = S[np.clip(np.floor(n * q - half), 0, last).astype(np.int64), cols]
+            upper = S[np.clip(np.ceil(n * q + half), 0, last).astype(np.int64), cols]
+            quartile_bounds.append((lower, upper))
+
+        for j, i in enumerate(numeric_idx):
+            col, count = columns[i], n[j]
+            if count == 0:
+                continue
+            std = values.get((col, "std_dev"))
+            if std is not None:
+                errors[(col, "mean")] = z * std / math.sqrt(count) * fpc
+            for q_name, (lower, upper) in zip(QUANTILE_NAMES, quartile_bounds):
+                estimate = values.get((col, q_name))
+                if estimate is not None:
+                    errors[(col, q_name)] = float(max(estimate - lower[j], upper[j] - estimate))
+            mode = values.get((col, "mode"))
+            if mode is not None:
+                p = float((X[:, j] == mode).sum()) / count
+                population_valid = count / len(df) * population
+                errors[(col, "mode")] = z * math.sqrt(p * (1 - p) / count) * population_valid
+            for metric, se in (("std_dev", std_se[j]), ("skewness", skew_se[j]), ("kurtosis", kurt_se[j])):
+                if not np.isnan(se):
+                    errors[(col, metric)] = t * float(se) * (fpc if metric == "std_dev" else 1.0)
+    return errors
+
+
+def approx_insights_task(dataset_id: int, columns=None, sample=None, stratify: str = None, seed=None) -> bytes:
+    """
+    Compute-pool entry point for mode=approx: profile a uniform (or, with `stratify`, stratified)
+    sample of the rows instead of all of them. Missing counts and maxima are read exactly from the
+    full Arrow columns (cheap); the other metrics come from the sample and carry the half-width
+    of their confidence interval in metric_error. The IPC schema metadata records the sample size.
+    """
+    load_columns = list(columns) if columns is not None else None
+    if stratify is not None and load_columns is not None and stratify not in load_columns:
+        load_columns.append(stratify)
+    table = load_table(dataset_id, columns=load_columns)
+    if stratify is not None and stratify not in table.schema.names:
+        raise UnknownColumnsError([stratify])
+
+    total = table.num_rows
+    size = sample_size(total, sample) if total else 0
+    report_columns = list(dict.fromkeys(columns)) if columns is not None else table.schema.names
+    if size >= total:
+        # The sample would be the whole dataset: exact results
+        rows = compute_insights(table.select(report_columns).to_pandas(split_blocks=True))
+        return insights_to_ipc(rows, metadata={"sample_rows": total, "total_rows": total})
+
+    strata = table.column(stratify).to_pandas() if stratify is not None else None
+    sampled = table.select(report_columns).take(pa.array(sample_indices(total, size, strata, seed)))
+    df = sampled.to_pandas(split_blocks=True)
+    rows = compute_insights(df)
+    errors = _confidence_errors(df, rows, total, seed)
+
+    full = table.select(report_columns)
+    numeric = {c for c, dtype in zip(df.columns, df.dtypes.tolist()) if pd.api.types.is_numeric_dtype(dtype)}
+    exact = {}
+    for col in report_columns:
+        column = full.column(col)
+        exact[(col, "missing_count")] = (str(column.null_count), float(column.null_count))
+        if col in numeric:
+            maximum = pc.max(column).as_py()
+            if maximum is not None:
+                exact[(col, "Q4 (Max)")] = (str(float(maximum)), float(maximum))
+
+    categorical = _categorical_estimates(df, rows, full)
+
+    result = []
+    for col, metric, text, value, _ in rows:
+        if (col, metric) in categorical:
+            result.append((col, metric) + categorical[(col, metric)])
+        elif (col, metric) in exact:
+            text, value = exact[(col, metric)]
+            result.append((col, metric, text, value, None))
+        else:
+            result.append((col, metric, text, value, errors.get((col, metric)) if value is not None else None))
+    return insights_to_ipc(result, metadata={"sample_rows": size, "total_rows": total})
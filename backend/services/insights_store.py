@@ -0,0 +1,184 @@
+import os
+
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from models import Dataset, DatasetInsights, InsightSnapshot
+from services.insights_engine import ENGINE_VERSION, INSIGHT_FIELDS
+from services.jobs import enqueue
+
+# Rows per executemany round trip when writing insights (and per DELETE when collecting old snapshots)
+INSIGHTS_BATCH_SIZE = int(os.getenv("INSIGHTS_BATCH_SIZE", 1000))
+
+
+def current_insights(dataset_id: int):
+    """
+    Filter for the rows of a dataset's current snapshot. The pointer is read in the same statement
+    as the rows, so a reader sees one complete snapshot even while another is being written or an
+    old one collected. Rows stored before snapshots (NULL) stay visible until the first new snapshot.
+    """
+    pointer = select(Dataset.insights_snapshot_id).where(Dataset.id == dataset_id).scalar_subquery()
+    return and_(DatasetInsights.dataset_id == dataset_id, DatasetInsights.snapshot_id.is_not_distinct_from(pointer))
+
+
+def query_insights(db: Session, dataset_id: int, columns=None, metrics=None):
+    """Current insight rows of a dataset (in INSIGHT_FIELDS order), optionally only some columns and metrics."""
+    query = select(*(getattr(DatasetInsights, field) for field in INSIGHT_FIELDS)).where(current_insights(dataset_id))
+    if columns is not None:
+        query = query.where(DatasetInsights.column_name.in_(columns))
+    if metrics is not None:
+        query = query.where(DatasetInsights.metric_name.in_(metrics))
+    return [tuple(row) for row in db.execute(query.order_by(DatasetInsights.id))]
+
+
+def new_snapshot(db: Session, dataset_id: int) -> int:
+    """Allocate the id of a new insight snapshot; ids only grow, so a larger id is a newer snapshot."""
+    snapshot = InsightSnapshot(dataset_id=dataset_id)
+    db.add(snapshot)
+    db.flush()
+    return snapshot.id
+
+
+def copy_insights(db: Session, source_id: int, dataset_id: int, snapshot_id: int, exclude_columns=None):
+    """Copy the current insight rows of `source_id` into a snapshot of `dataset_id` server-side. Does not commit."""
+    query = select(
+        literal(dataset_id),
+        literal(snapshot_id),
+        *(getattr(DatasetInsights, field) for field in INSIGHT_FIELDS)
+    ).where(current_insights(source_id))
+    if exclude_columns is not None:
+        query = query.where(DatasetInsights.column_name.not_in(exclude_columns))
+    db.execute(insert(DatasetInsights).from_select(["dataset_id", "snapshot_id", *INSIGHT_FIELDS], query))
+
+
+def bulk_insert_insights(db: Session, dataset_id: int, rows, snapshot_id: int = None,
+                         batch_size: int = INSIGHTS_BATCH_SIZE) -> int:
+    """
+    Insert insight rows (tuples in INSIGHT_FIELDS order) with Core executemany, one round trip
+    per `batch_size` rows instead of one ORM object per metric. Does not commit.
+    """
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(dict(zip(INSIGHT_FIELDS, row), dataset_id=dataset_id, snapshot_id=snapshot_id))
+        if len(batch) >= batch_size:
+            db.execute(insert(DatasetInsights), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(DatasetInsights), batch)
+        count += len(batch)
+    return count
+
+
+# Result kinds from most to least precise; stored results satisfy requests for any kind after theirs
+INSIGHT_PRECISION = ("exact", "stream", "approx")
+
+
+def insights_cache_key(dataset: Dataset, mode: str = "exact"):
+    """
+    Version of a dataset's insights: its content hash plus the engine version, and a ":<mode>"
+    suffix for approximate (stream/approx) results. None without a content hash.
+    """
+    if not dataset.content_hash:
+        return None
+    key = f"{dataset.content_hash}:{ENGINE_VERSION}"
+    return key if mode == "exact" else f"{key}:{mode}"
+
+
+def _keys_at_least(dataset: Dataset, mode: str):
+    """Cache keys of results at least as precise as `mode`."""
+    return [insights_cache_key(dataset, m) for m in INSIGHT_PRECISION[:INSIGHT_PRECISION.index(mode) + 1]]
+
+
+def cached_insights_count(db: Session, dataset: Dataset, selected_columns=None, mode: str = "exact"):
+    """
+    Number of stored insights still valid for `dataset` (restricted to `selected_columns` if given),
+    or None when they have to be computed: no full set stored for the current data and engine
+    version, or a selected column without stored insights. More precise results also satisfy
+    requests for approximate ones.
+    """
+    if dataset.insights_key is None or dataset.insights_key not in _keys_at_least(dataset, mode):
+        return None
+
+    query = db.query(
+        func.count(DatasetInsights.id),
+        func.count(DatasetInsights.column_name.distinct())
+    ).filter(current_insights(dataset.id))
+    if selected_columns is not None:
+        query = query.filter(DatasetInsights.column_name.in_(selected_columns))
+    count, column_count = query.one()
+
+    if count == 0 or (selected_columns is not None and column_count < len(set(selected_columns))):
+        return None
+    return count
+
+
+def replace_insights(db: Session, dataset: Dataset, rows, selected_columns=None, mode: str = "exact") -> int:
+    """
+    Write `rows` as a new snapshot of a dataset's insights and switch the dataset to it in one
+    transaction; readers keep seeing the previous snapshot until the commit. For a subset of
+    columns the other columns' current rows are carried over into the new snapshot.
+    A full recompute also records the cache key of `mode`, so later calls can be served from the
+    stored rows; approximate rows written into a more precise set downgrade its key.
+    The superseded snapshot is deleted later by an insights_gc job; if a snapshot started later was
+    switched to first, the rows just written are garbage already and are collected right away.
+    """
+    snapshot_id = new_snapshot(db, dataset.id)
+    if selected_columns is not None:
+        copy_insights(db, dataset.id, dataset.id, snapshot_id, exclude_columns=selected_columns)
+    count = bulk_insert_insights(db, dataset.id, rows, snapshot_id)
+
+    values = {"insights_snapshot_id": snapshot_id}
+    insights_key = insights_cache_key(dataset, mode)
+    if selected_columns is None:
+        values["insights_key"] = insights_key
+    elif insights_key is not None and mode != "exact":
+        more_precise = _keys_at_least(dataset, mode)[:-1]
+        values["insights_key"] = case(
+            (Dataset.insights_key.in_(more_precise), insights_key), else_=Dataset.insights_key
+        )
+    # Only move forward: if a snapshot started later has already been switched to, this one is garbage
+    switched = db.execute(
+        update(Dataset)
+        .where(
+            Dataset.id == dataset.id,
+            or_(Dataset.insights_snapshot_id.is_(None), Dataset.insights_snapshot_id < snapshot_id)
+        )
+        .values(**values)
+    ).rowcount
+    db.commit()
+
+    if switched:
+        enqueue("insights_gc", {"dataset_id": dataset.id})
+    else:
+        # Lost the race: the winner's GC may have run before these rows were committed
+        collect_insight_snapshots(db, dataset.id)
+    return count
+
+
+def collect_insight_snapshots(db: Session, dataset_id: int, batch_size: int = INSIGHTS_BATCH_SIZE) -> int:
+    """
+    Delete the insight rows of snapshots older than the dataset's current one, `batch_size` rows
+    per transaction so no single DELETE holds locks for long. Returns the number of rows deleted.
+    """
+    current = db.query(Dataset.insights_snapshot_id).filter(Dataset.id == dataset_id).scalar()
+    if current is None:
+        return 0
+
+    stale = and_(
+        DatasetInsights.dataset_id == dataset_id,
+        or_(DatasetInsights.snapshot_id.is_(None), DatasetInsights.snapshot_id < current)
+    )
+    deleted = 0
+    while True:
+        ids = [row[0] for row in db.execute(select(DatasetInsights.id).where(stale).limit(batch_size))]
+        if not ids:
+            break
+        db.execute(delete(DatasetInsights).where(DatasetInsights.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+
+    db.execute(delete(InsightSnapshot).where(InsightSnapshot.dataset_id == dataset_id, InsightSnapshot.id < current))
+    db.commit()
+    return deleted
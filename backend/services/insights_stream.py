@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.dataset_io import estimated_memory_bytes, iter_dataset_chunks, row_group_count
+from services.dataset_loader import fetch_dataset
+from services.insights_engine import (
+    QUANTILES, QUANTILE_NAMES, categorical_rows, insights_to_ipc, metric_row, mode_text, moment_stats
+)
+from services.sketches import HyperLogLog, KllSketch, MisraGries, MomentsAccumulator, SpaceSaving
+
+# Rows per chunk in streaming mode; memory is bounded by this, not by the file size
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 100_000))
+# mode=auto streams datasets whose estimated in-memory size exceeds this
+INSIGHTS_STREAM_THRESHOLD = int(os.getenv("INSIGHTS_STREAM_THRESHOLD", 1024 ** 3))  # 1 GiB
+
+
+class StreamingProfile:
+    """
+    Mergeable per-column accumulators for the insight metrics: exact missing counts and moments,
+    KLL sketches for the quartiles and Misra-Gries counters for the mode; non-numeric columns
+    get HyperLogLog and Space-Saving sketches for their distinct count and top values.
+    Columns stay numeric until a chunk holds text in them, matching how pandas would type
+    the whole column. The numeric values seen before that are not in the categorical sketches;
+    they are counted as unseen and widen the reported error bounds.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        width = len(self.columns)
+        self.missing = np.zeros(width, dtype=np.int64)
+        self.numeric = np.ones(width, dtype=bool)
+        self.kinds = [set() for _ in self.columns]
+        self.moments = MomentsAccumulator(width)
+        self.quantiles = [KllSketch() for _ in self.columns]
+        self.modes = [MisraGries() for _ in self.columns]
+        self.distinct = [None] * width  # HyperLogLog once the column is known to be non-numeric
+        self.top = [None] * width  # SpaceSaving, likewise
+
+    def _start_categorical(self, i: int):
+        self.numeric[i] = False
+        self.distinct[i], self.top[i] = HyperLogLog(), SpaceSaving()
+        self.top[i].skip(int(self.moments.n[i]))
+
+    def update(self, chunk: pd.DataFrame):
+        self.missing += chunk.isna().sum().to_numpy()
+
+        idx = []
+        for i, dtype in enumerate(chunk.dtypes.tolist()):
+            if self.numeric[i]:
+                if pd.api.types.is_numeric_dtype(dtype):
+                    idx.append(i)
+                    self.kinds[i].add(dtype.kind)
+                    continue
+                if not chunk.iloc[:, i].notna().any():
+                    continue
+                self._start_categorical(i)
+            values = chunk.iloc[:, i]
+            values = values[values.notna()]
+            self.distinct[i].update(values.to_numpy())
+            self.top[i].update(values)
+        if not idx or not len(chunk):
+            return
+
+        X = chunk.iloc[:, idx].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.moments.update(idx, X)
+        for j, i in enumerate(idx):
+            values = X[:, j]
+            values = values[~np.isnan(values)]
+            self.quantiles[i].update(values)
+            self.modes[i].update(values)
+
+    def merge(self, other: "StreamingProfile"):
+        """Fold in a profile built over other rows of the same columns."""
+        for i in range(len(self.columns)):
+            if self.numeric[i] and other.numeric[i]:
+                continue
+            if self.numeric[i]:
+                self._start_categorical(i)
+            if other.numeric[i]:
+                self.top[i].skip(int(other.moments.n[i]))
+            else:
+                self.distinct[i].merge(other.distinct[i])
+                self.top[i].merge(other.top[i])
+
+        self.missing += other.missing
+        for kinds, other_kinds in zip(self.kinds, other.kinds):
+            kinds |= other_kinds
+        self.moments.merge(other.moments)
+        for sketch, other_sketch in zip(self.quantiles, other.quantiles):
+            sketch.merge(other_sketch)
+        for counter, other_counter in zip(self.modes, other.modes):
+            counter.merge(other_counter)
+
+    def rows(self):
+        """
+        Insight rows in the same order and text format as compute_insights. metric_error holds the
+        value-space half-width for the quartiles (~95% confidence), the maximum undercount of the
+        mode's frequency and the sketch bounds of distinct counts and top-value counts; the other
+        metrics are exact and carry None. When no value outlived the mode counters the mode is NULL,
+        with a text that says so (unlike "None", which means the column had no values).
+        """
+        n = self.moments.n
+        std, skew, kurt = moment_stats(n, self.moments.m2, self.moments.m3, self.moments.m4)
+        mean = np.where(n > 0, self.moments.mean, np.nan)
+
+        insights = []
+        for i, col in enumerate(self.columns):
+            insights.append(metric_row(col, "missing_count", self.missing[i], str(int(self.missing[i]))))
+            if not self.numeric[i]:
+                insights.extend(categorical_rows(col, self.distinct[i], self.top[i]))
+                continue
+
+            sketch, counter = self.quantiles[i], self.modes[i]
+            insights.append(metric_row(col, "mean", mean[i]))
+            insights.append(metric_row(col, "std_dev", std[i]))
+            for q, q_name, q_val in zip(QUANTILES, QUANTILE_NAMES, sketch.quantiles(QUANTILES)):
+                # The maximum is tracked exactly
+                error = sketch.quantile_error(q, q_val) if sketch.n and q < 1 else None
+                insights.append(metric_row(col, q_name, q_val, error=error))
+            kinds = self.kinds[i]
+            kind = next(iter(kinds)) if len(kinds) == 1 else "f"
+            mode = counter.mode()
+            if sketch.n and np.isnan(mode):
+                # Every counter was cut (e.g. all values distinct): no heavy hitter to report, only its bound
+                insights.append((col, "mode", f"No value occurs more than {counter.error} times", None, None))
+            else:
+                insights.append(metric_row(
+                    col, "mode", mode, mode_text(mode, kind), error=float(counter.error) if sketch.n else None
+                ))
+            insights.append(metric_row(col, "skewness", skew[i]))
+            insights.append(metric_row(col, "kurtosis", kurt[i]))
+
+        return insights
+
+
+def resolve_mode(dataset, mode: str) -> str:
+    """Turn mode=auto into exact or stream depending on the dataset's estimated in-memory size."""
+    if mode != "auto":
+        return mode
+    return "stream" if estimated_memory_bytes(dataset) > INSIGHTS_STREAM_THRESHOLD else "exact"
+
+
+def row_group_parts(dataset, parts: int):
+    """
+    The Parquet sidecar's row groups split into at most `parts` contiguous runs, each profiled by its
+    own worker; [None] (all rows in one pass) before ingest or when there is a single row group.
+    """
+    count = row_group_count(dataset)
+    if count <= 1 or parts <= 1:
+        return [None]
+    bounds = np.linspace(0, count, min(parts, count) + 1).round().astype(int)
+    return [list(range(start, end)) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def stream_profile_task(dataset_id: int, columns=None, row_groups=None) -> StreamingProfile:
+    """
+    Compute-pool entry point: profile some row groups of a dataset (all rows when None) chunk by chunk
+    and return the profile itself. It holds sketches, not rows, so it pickles back cheaply and the
+    profiles of the other row groups can be merged into it.
+    """
+    dataset = fetch_dataset(dataset_id)
+    profile = None
+    for chunk in iter_dataset_chunks(dataset, columns, STREAM_CHUNK_ROWS, row_groups):
+        if profile is None:
+            profile = StreamingProfile(chunk.columns)
+        profile.update(chunk)
+    return profile
+
+
+def merged_insights(profiles) -> bytes:
+    """Merge the profiles of consecutive row ranges and return their insights as an Arrow IPC stream."""
+    profiles = [profile for profile in profiles if profile is not None]
+    if not profiles:
+        return insights_to_ipc([])
+    merged = profiles[0]
+    for profile in profiles[1:]:
+        merged.merge(profile)
+    return insights_to_ipc(merged.rows())
+
+
+def stream_insights_task(dataset_id: int, columns=None) -> bytes:
+    """
+    Compute-pool entry point for files larger than memory: profile the dataset chunk by chunk and
+    return the insights as an Arrow IPC stream, like insights_task.
+    """
+    return merged_insights([stream_profile_task(dataset_id, columns)])
@@ -0,0 +1,200 @@
+import importlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+import traceback
+
+# Local job queue: an SQLite table polled by a small pool of worker processes (no broker needed)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 0.5))
+# Longest wait between retries when the jobs database is unavailable (locked, disk full, ...)
+JOB_MAX_BACKOFF = float(os.getenv("JOB_MAX_BACKOFF", 30))
+
+# Modules that register job handlers; imported by every worker process
+HANDLER_MODULES = ["services.ingest", "services.insights_jobs"]
+
+_handlers = {}
+
+
+def job_handler(kind: str):
+    """Register `func(payload: dict) -> dict | None` as the handler for jobs of `kind`."""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def init_queue():
+    """Create the jobs table and requeue jobs left running by workers that no longer exist."""
+    conn = _connect()
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                result TEXT,
+                error TEXT,
+                worker_pid INTEGER,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, id)")
+
+        running = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+        for row in running:
+            if row["worker_pid"] is None or not _pid_alive(row["worker_pid"]):
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ? AND status = 'running'",
+                    (row["id"],)
+                )
+    finally:
+        conn.close()
+
+
+def enqueue(kind: str, payload: dict) -> int:
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "INSERT INTO jobs (kind, payload, created_at) VALUES (?, ?, ?)",
+            (kind, json.dumps(payload), time.time())
+        )
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+
+def get_job(job_id: int):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def _claim_next(conn: sqlite3.Connection):
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same job
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?",
+                (os.getpid(), time.time(), row["id"])
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def _finish(conn: sqlite3.Connection, job_id: int, status: str, result=None, error: str = None):
+    conn.execute(
+        "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+        (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+    )
+
+
+def _retry(stop_event, func, *args, **kwargs):
+    """
+    Call `func` until it gets past an SQLite error, backing off from JOB_POLL_INTERVAL up to JOB_MAX_BACKOFF,
+    so a locked or full jobs database stalls the worker instead of killing it. Returns None once stopped.
+    """
+    delay = JOB_POLL_INTERVAL
+    while not stop_event.is_set():
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.Error:
+            traceback.print_exc()
+            stop_event.wait(delay)
+            delay = min(delay * 2, JOB_MAX_BACKOFF)
+    return None
+
+
+def worker_loop(stop_event):
+    """Claim and run queued jobs until `stop_event` is set."""
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+    conn = _connect()
+    try:
+        while not stop_event.is_set():
+            row = _retry(stop_event, _claim_next, conn)
+            if row is None:
+                stop_event.wait(JOB_POLL_INTERVAL)
+                continue
+
+            handler = _handlers.get(row["kind"])
+            if handler is None:
+                error = f"No handler for job kind '{row['kind']}'"
+                _retry(stop_event, _finish, conn, row["id"], "failed", error=error)
+                continue
+
+            try:
+                result = handler(json.loads(row["payload"]))
+            except Exception:
+                _retry(stop_event, _finish, conn, row["id"], "failed", error=traceback.format_exc())
+            else:
+                _retry(stop_event, _finish, conn, row["id"], "done", result=result)
+    finally:
+        conn.close()
+
+
+class WorkerPool:
+    """A fixed set of worker processes consuming the job queue."""
+
+    def __init__(self, size: int = JOB_WORKERS):
+        self.size = size
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = self._ctx.Event()
+        self._processes = []
+
+    def start(self):
+        init_queue()
+        for i in range(self.size):
+            process = self._ctx.Process(
+                target=worker_loop, args=(self._stop_event,), name=f"job-worker-{i}", daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout: float = 10):
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
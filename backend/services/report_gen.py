@@ -0,0 +1,114 @@
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+)
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+
+from collections import defaultdict
+import re
+
+# Define display order for better readability
+METRIC_ORDER = [
+    "missing_count", "mean", "std_dev", "Q1", "Q2 (Median)", "Q3", "Q4 (Max)", "mode", "skewness", "kurtosis",
+    "distinct_count"
+]
+# Counts and modes keep their stored text (ints, booleans); other numbers are shown rounded
+VERBATIM_METRICS = {"missing_count", "mode", "distinct_count"}
+# Categorical top values are stored as top_<i> (the value) and top_<i>_count (its frequency)
+TOP_VALUE = re.compile(r"^top_(\d+)$")
+MAX_VALUE_CHARS = 40
+
+
+def metric_sort_key(metric_name: str):
+    if metric_name in METRIC_ORDER:
+        return METRIC_ORDER.index(metric_name), 0
+    match = TOP_VALUE.match(metric_name)
+    if match:
+        return len(METRIC_ORDER), int(match.group(1))
+    return len(METRIC_ORDER) + 1, 0
+
+
+def format_metric(metric_name: str, metric_value, metric_value_num=None, metric_error=None) -> str:
+    if metric_value_num is None or metric_name in VERBATIM_METRICS:
+        text = str(metric_value)
+    else:
+        text = f"{metric_value_num:.6g}"
+    if metric_error is not None:
+        # Approximate (streamed) metric; the mode's bound is on its frequency, not its value
+        text += f" (± {metric_error:.3g} count)" if metric_name == "mode" else f" (± {metric_error:.3g})"
+    return text
+
+
+def _merge_top_values(metrics: dict):
+    """Turn top_<i> / top_<i>_count pairs into one "Top i" row: value (count)."""
+    rows = []
+    for metric_name, text in metrics.items():
+        if metric_name.endswith("_count") and TOP_VALUE.match(metric_name[:-len("_count")]):
+            continue
+        match = TOP_VALUE.match(metric_name)
+        if match:
+            value = text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS - 1] + "…"
+            count = metrics.get(f"{metric_name}_count")
+            rows.append((metric_name, f"Top {match.group(1)}", f"{value} ({count})" if count else value))
+        else:
+            rows.append((metric_name, metric_name, text))
+    return rows
+
+
+def build_pdf_report(file_path: str, dataset_info: dict, insights):
+    """
+    Write the PDF report for one dataset to `file_path`.
+    `dataset_info` holds name/filename/id/upload_date (already formatted) and `insights` is a list of
+    (column_name, metric_name, metric_value, metric_value_num, metric_error) tuples. Plain data in, so it can run in the compute pool.
+    """
+    doc = SimpleDocTemplate(file_path, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # ----------------------------------------------------------
+    # Report Header
+    # ----------------------------------------------------------
+    story.append(Paragraph(f"Dataset Report: <b>{dataset_info['name']}</b>", styles["Title"]))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(f"<b>Filename:</b> {dataset_info['filename'] or 'N/A'}", styles["Normal"]))
+    story.append(Paragraph(f"<b>Dataset ID:</b> {dataset_info['id']}", styles["Normal"]))
+    story.append(Paragraph(f"<b>Upload Date:</b> {dataset_info['upload_date']}", styles["Normal"]))
+    story.append(Spacer(1, 20))
+
+    # ----------------------------------------------------------
+    # Insights Section (Sorted and Clean)
+    # ----------------------------------------------------------
+    grouped_insights = defaultdict(dict)
+    for column_name, metric_name, *values in insights:
+        grouped_insights[column_name][metric_name] = format_metric(metric_name, *values)
+
+    story.append(Paragraph("<b>Insights Summary</b>", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+
+    for column, metrics in grouped_insights.items():
+        # Sort metrics based on the predefined order
+        metrics_sorted = sorted(_merge_top_values(metrics), key=lambda x: metric_sort_key(x[0]))
+
+        story.append(Paragraph(f"<b>{column}</b>", styles["Heading3"]))
+        data = [["Metric", "Value"]]
+        for _, label, metric_value in metrics_sorted:
+            data.append([str(label), str(metric_value)])
+
+        table = Table(data, colWidths=[200, 200])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ]))
+        story.append(table)
+        story.append(Spacer(1, 15))
+
+    # ----------------------------------------------------------
+    # Build PDF
+    # ----------------------------------------------------------
+    doc.build(story)
+    return file_path
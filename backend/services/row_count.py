@@ -0,0 +1,59 @@
+from openpyxl import load_workbook
+
+
+class CsvRowCounter:
+    """
+    Incremental CSV record counter fed with raw byte chunks while an upload streams to disk.
+    Newlines inside quoted fields are ignored; an escaped quote ("") toggles the quote state
+    twice, so it needs no special handling. The header line is not counted.
+    """
+
+    def __init__(self):
+        self.line_breaks = 0
+        self.in_quotes = False
+        self.last_byte = b""
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return
+
+        if not self.in_quotes and b'"' not in chunk:
+            self.line_breaks += chunk.count(b"\n")
+        else:
+            # Split on quotes: segments alternate between outside and inside a quoted field
+            segments = chunk.split(b'"')
+            inside = self.in_quotes
+            for segment in segments:
+                if not inside:
+                    self.line_breaks += segment.count(b"\n")
+                inside = not inside
+            # An odd number of quote characters flips the state carried into the next chunk
+            if (len(segments) - 1) % 2:
+                self.in_quotes = not self.in_quotes
+
+        self.last_byte = chunk[-1:]
+
+    @property
+    def total_rows(self) -> int:
+        lines = self.line_breaks
+        # The last record may not be terminated by a newline
+        if self.last_byte and self.last_byte != b"\n":
+            lines += 1
+        return max(lines - 1, 0)
+
+
+def count_xlsx_rows(file_path: str) -> int:
+    """
+    Count data rows of the first sheet from its stored dimension (read-only mode),
+    falling back to iterating rows when the workbook does not record one.
+    """
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        ws = wb.active
+        max_row = ws.max_row
+        if max_row is None:
+            ws.reset_dimensions()
+            max_row = sum(1 for _ in ws.iter_rows(values_only=True))
+        return max(max_row - 1, 0)
+    finally:
+        wb.close()
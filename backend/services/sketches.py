@@ -0,0 +1,292 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Accuracy knobs of the streaming sketches (larger = more memory, smaller error)
+KLL_K = int(os.getenv("KLL_K", 400))
+MODE_COUNTERS = int(os.getenv("MODE_COUNTERS", 1000))
+HLL_PRECISION = int(os.getenv("HLL_PRECISION", 14))  # 2**14 registers, ~0.8% standard error
+TOP_K_CAPACITY = int(os.getenv("TOP_K_CAPACITY", 100))  # counters kept by the top-k summary
+
+
+class MomentsAccumulator:
+    """
+    Count, mean and central moment sums (M2, M3, M4) of many columns at once.
+    Batches are summarised on their own and folded in with the pairwise update formulas
+    (Welford/Chan for the variance, Pébay for the higher moments), so accumulators built over
+    different chunks or processes can be merged without losing precision.
+    """
+
+    def __init__(self, width: int):
+        self.n = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.m3 = np.zeros(width)
+        self.m4 = np.zeros(width)
+
+    def update(self, idx, X: np.ndarray):
+        """Fold the rows of `X` (NaN = missing) into the columns at positions `idx`."""
+        valid = ~np.isnan(X)
+        n = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, np.where(valid, X, 0.0).sum(axis=0) / n, 0.0)
+        dev = np.where(valid, X - mean, 0.0)
+        dev2 = dev * dev
+        self._combine(idx, n, mean, dev2.sum(axis=0), (dev2 * dev).sum(axis=0), (dev2 * dev2).sum(axis=0))
+
+    def merge(self, other: "MomentsAccumulator"):
+        self._combine(slice(None), other.n, other.mean, other.m2, other.m3, other.m4)
+
+    def _combine(self, idx, nb, mean_b, m2b, m3b, m4b):
+        na, mean_a = self.n[idx].copy(), self.mean[idx].copy()
+        m2a, m3a, m4a = self.m2[idx].copy(), self.m3[idx].copy(), self.m4[idx].copy()
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = np.where(n > 0, mean_b - mean_a, 0.0)
+            safe_n = np.where(n > 0, n, 1.0)
+            self.mean[idx] = mean_a + delta * nb / safe_n
+            self.m2[idx] = m2a + m2b + delta ** 2 * na * nb / safe_n
+            self.m3[idx] = (
+                m3a + m3b
+                + delta ** 3 * na * nb * (na - nb) / safe_n ** 2
+                + 3 * delta * (na * m2b - nb * m2a) / safe_n
+            )
+            self.m4[idx] = (
+                m4a + m4b
+                + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / safe_n ** 3
+                + 6 * delta ** 2 * (na * na * m2b + nb * nb * m2a) / safe_n ** 2
+                + 4 * delta * (na * m3b - nb * m3a) / safe_n
+            )
+        self.n[idx] = n
+
+
+class KllSketch:
+    """
+    KLL quantile sketch: a stack of compactors where level h holds items of weight 2**h.
+    A full level is sorted and every other item (random offset) is promoted, so memory stays
+    O(k log(n/k)) while each rank keeps an unbiased estimate. The variance bound of the rank
+    error is tracked as compactions happen and exposed through `rank_error()`.
+    """
+
+    def __init__(self, k: int = KLL_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._variance = 0.0  # sum of squared worst-case rank shifts of all compactions
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: np.ndarray):
+        """Add a 1-D array of non-missing values."""
+        if not len(values):
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KllSketch"):
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._variance += other._variance
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved exactly
+                keep, items = (items[-1:], items[:-1]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+                # A compaction moves any rank by at most 2**level
+                self._variance += 4.0 ** level
+            level += 1
+
+    def rank_error(self) -> float:
+        """Normalised rank error that holds with ~95% probability (two standard deviations)."""
+        if not self.n:
+            return 0.0
+        return 2 * np.sqrt(self._variance) / self.n
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Approximate values at the fractions `qs`; 0 and 1 return the exact min and max."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.n:
+            return np.full(qs.shape, np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, qs * cumulative[-1], side="left").clip(0, len(values) - 1)
+        result = values[idx]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile_error(self, q: float, value: float) -> float:
+        """Value-space half-width around the estimate of `q` implied by the rank error."""
+        if not self.n:
+            return 0.0
+        eps = self.rank_error()
+        lower, upper = self.quantiles([max(q - eps, 0.0), min(q + eps, 1.0)])
+        return float(max(value - lower, upper - value))
+
+
+class MisraGries:
+    """
+    Heavy-hitters summary with at most `k` counters. Stored counts undercount the true
+    frequencies by at most `error`, so the reported mode is exact whenever its lead over
+    the runner-up exceeds that bound.
+    """
+
+    def __init__(self, k: int = MODE_COUNTERS):
+        self.k = k
+        self.counts = {}
+        self.error = 0
+
+    def update(self, values: np.ndarray):
+        """Add a 1-D array of non-missing values."""
+        if not len(values):
+            return
+        uniques, counts = np.unique(values, return_counts=True)
+        # Summarise the batch on its own first so only k candidates reach the dict
+        if len(uniques) > self.k:
+            cut = np.partition(counts, len(counts) - self.k - 1)[len(counts) - self.k - 1]
+            keep = counts > cut
+            uniques, counts = uniques[keep], counts[keep] - cut
+            self.error += int(cut)
+        self._add(zip(uniques.tolist(), counts.tolist()))
+
+    def merge(self, other: "MisraGries"):
+        self.error += other.error
+        self._add(other.counts.items())
+
+    def _add(self, items):
+        for value, count in items:
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.k:
+            cut = sorted(self.counts.values(), reverse=True)[self.k]
+            self.counts = {value: count - cut for value, count in self.counts.items() if count > cut}
+            self.error += cut
+
+    def mode(self) -> float:
+        """Most frequent value (smallest among ties, like pandas), NaN when nothing was kept."""
+        if not self.counts:
+            return np.nan
+        best = max(self.counts.values())
+        return min(value for value, count in self.counts.items() if count == best)
+
+
+class HyperLogLog:
+    """
+    Distinct-count estimate from 2**precision one-byte registers, each keeping the longest run of
+    leading zeros among the hashes routed to it. Registers merge with an element-wise max.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray):
+        """Add a 1-D array of non-missing values (any dtype pandas can hash)."""
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # frexp's exponent is the bit length; suffixes are below 2**53, so the float is exact
+        _, bit_length = np.frexp(suffix.astype(np.float64))
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            return m * np.log(m / zeros)
+        return float(raw)
+
+    def error(self) -> float:
+        """Half-width of the ~95% interval of the estimate (two relative standard errors)."""
+        return 2 * 1.04 / np.sqrt(len(self.registers)) * self.estimate()
+
+
+class SpaceSaving:
+    """
+    Mergeable top-k frequency summary (Space-Saving / Misra-Gries family) with `capacity` counters.
+    Each monitored value has an estimated count and an error: true count lies in
+    [count - error, count] for the values seen, and any unmonitored value occurred at most `floor`
+    times. Batches are counted exactly and folded in with the mergeable-summaries rule.
+    `unseen` counts values that were deliberately not fed (they can add to any count).
+    """
+
+    def __init__(self, capacity: int = TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.floor = 0
+        self.unseen = 0
+
+    def update(self, values):
+        """Add the non-missing values of a Series or 1-D array."""
+        if not len(values):
+            return
+        counts = pd.Series(values).value_counts()
+        floor = int(counts.iloc[self.capacity]) if len(counts) > self.capacity else 0
+        head = counts.iloc[:self.capacity]
+        self._merge(dict(zip(head.index.tolist(), head.tolist())), {}, floor)
+
+    def skip(self, n: int):
+        self.unseen += n
+
+    def merge(self, other: "SpaceSaving"):
+        self.unseen += other.unseen
+        self._merge(other.counts, other.errors, other.floor)
+
+    def _merge(self, counts: dict, errors: dict, floor: int):
+        merged, merged_errors = {}, {}
+        for value in self.counts.keys() | counts.keys():
+            merged[value] = self.counts.get(value, self.floor) + counts.get(value, floor)
+            merged_errors[value] = (
+                (self.errors.get(value, 0) if value in self.counts else self.floor)
+                + (errors.get(value, 0) if value in counts else floor)
+            )
+        ranked = sorted(merged, key=merged.get, reverse=True)
+        dropped = merged[ranked[self.capacity]] if len(ranked) > self.capacity else 0
+        self.floor = max(self.floor + floor, dropped)
+        self.counts = {value: merged[value] for value in ranked[:self.capacity]}
+        self.errors = {value: merged_errors[value] for value in ranked[:self.capacity]}
+
+    def exact_distinct(self):
+        """Number of distinct values when nothing was ever evicted or skipped, else None."""
+        return len(self.counts) if self.floor == 0 and self.unseen == 0 else None
+
+    def top(self, k: int):
+        """The `k` most frequent values as (value, count, error) with error bounding |true - count|."""
+        ranked = sorted(self.counts, key=lambda value: (-self.counts[value], str(value)))[:k]
+        return [(value, self.counts[value], max(self.errors[value], self.unseen)) for value in ranked]
@@ -0,0 +1,101 @@
+import os
+import uuid
+
+UPLOAD_FOLDER = "uploaded_files"
+
+# Uploads are stored once per content hash: uploaded_files/blobs/<h[:2]>/<sha256><ext>
+BLOB_FOLDER = os.path.join(UPLOAD_FOLDER, "blobs")
+TMP_FOLDER = os.path.join(UPLOAD_FOLDER, "tmp")
+# Columnar copy of every dataset written once at ingest; all readers use it when present
+PARQUET_FOLDER = os.path.join(UPLOAD_FOLDER, "parquet")
+# Uncompressed Arrow IPC copies of hot datasets, memory-mapped by every worker process
+ARROW_CACHE_FOLDER = os.getenv("ARROW_CACHE_FOLDER", os.path.join("cache", "arrow"))
+# Correlation results keyed by content hash, method and column selection
+CORRELATION_CACHE_FOLDER = os.getenv("CORRELATION_CACHE_FOLDER", os.path.join("cache", "correlations"))
+os.makedirs(BLOB_FOLDER, exist_ok=True)
+os.makedirs(TMP_FOLDER, exist_ok=True)
+os.makedirs(PARQUET_FOLDER, exist_ok=True)
+os.makedirs(ARROW_CACHE_FOLDER, exist_ok=True)
+os.makedirs(CORRELATION_CACHE_FOLDER, exist_ok=True)
+
+
+def new_temp_path(ext: str) -> str:
+    """A unique path to stream an upload into before its hash is known."""
+    return os.path.join(TMP_FOLDER, f"{uuid.uuid4().hex}{ext}")
+
+
+def blob_path(content_hash: str, ext: str) -> str:
+    return os.path.join(BLOB_FOLDER, content_hash[:2], f"{content_hash}{ext.lower()}")
+
+
+def commit_blob(temp_path: str, content_hash: str, ext: str):
+    """
+    Move a fully written temp file to its content address.
+    Returns (path, created); when the blob already exists the temp file is discarded.
+    os.replace is atomic, so concurrent uploads of the same bytes cannot corrupt the blob.
+    """
+    path = blob_path(content_hash, ext)
+    if os.path.exists(path):
+        os.remove(temp_path)
+        return path, False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(temp_path, path)
+    return path, True
+
+
+def dataset_file_path(dataset) -> str:
+    """Location of a dataset's original file (datasets uploaded before hashing live under their filename)."""
+    if dataset.content_hash:
+        return blob_path(dataset.content_hash, os.path.splitext(dataset.filename)[1])
+    return os.path.join(UPLOAD_FOLDER, dataset.filename)
+
+
+def _storage_key(dataset) -> str:
+    return dataset.content_hash or f"dataset_{dataset.id}"
+
+
+def parquet_path(dataset) -> str:
+    """Location of a dataset's Parquet sidecar (shared by every dataset with the same content)."""
+    return os.path.join(PARQUET_FOLDER, f"{_storage_key(dataset)}.parquet")
+
+
+def arrow_cache_path(dataset) -> str:
+    """Location of a dataset's memory-mappable Arrow IPC file in the shared cache."""
+    return os.path.join(ARROW_CACHE_FOLDER, f"{_storage_key(dataset)}.arrow")
+
+
+def correlation_cache_path(dataset, key: str):
+    """
+    Location of a cached correlation result; `key` identifies the method and column selection.
+    None for datasets uploaded before hashing: their id says nothing about the content, so they are not cached.
+    """
+    if not dataset.content_hash:
+        return None
+    return os.path.join(CORRELATION_CACHE_FOLDER, f"{dataset.content_hash}_{key}.arrow")
+
+
+def prune_cache(folder: str, max_bytes: int, keep: str):
+    """Delete the least recently used (oldest mtime) .arrow files of a cache folder until it fits `max_bytes`."""
+    entries = []
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.endswith(".arrow") and path != keep:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    if os.path.exists(keep):
+        total += os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        # Processes that already mapped the file keep their mapping after unlink
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import types
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The app creates its upload/cache folders and jobs.db relative to the working directory
+WORK_DIR = tempfile.mkdtemp(prefix="dashboard-tests-")
+os.chdir(WORK_DIR)
+os.environ.setdefault("JOB_DB_PATH", os.path.join(WORK_DIR, "jobs.db"))
+
+
+def _sqlite_database() -> types.ModuleType:
+    """Stand-in for the `database` module: same names, backed by an SQLite file instead of MySQL."""
+    module = types.ModuleType("database")
+    module.DATABASE_URL = f"sqlite:///{os.path.join(WORK_DIR, 'dashboard.db')}"
+    module.engine = create_engine(module.DATABASE_URL, connect_args={"check_same_thread": False})
+    module.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=module.engine)
+    module.Base = declarative_base()
+
+    def get_db():
+        db = module.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    module.get_db = get_db
+    return module
+
+
+sys.modules["database"] = _sqlite_database()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def app():
+    from main import app
+    from services.jobs import init_queue
+
+    init_queue()
+    return app
+
+
+@pytest.fixture
+def db():
+    import models  # noqa: F401  (registers the tables)
+
+    database = sys.modules["database"]
+    database.Base.metadata.create_all(bind=database.engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,36 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from services.dataset_io import UnknownColumnsError, read_dataset, write_parquet_sidecar
+from services.storage import UPLOAD_FOLDER, parquet_path
+
+
+def _xlsx_dataset(dataset_id: int, df: pd.DataFrame):
+    # Ids far above the ones the database hands out, so sidecars never collide with other tests' datasets
+    dataset = SimpleNamespace(id=dataset_id, filename=f"dataset_{dataset_id}.xlsx", content_hash=None)
+    df.to_excel(os.path.join(UPLOAD_FOLDER, dataset.filename), index=False)
+    return dataset
+
+
+def test_sidecar_stores_mixed_type_columns_as_text():
+    dataset = _xlsx_dataset(9001, pd.DataFrame({"mixed": [1, "x", None, 2.5], "number": [1, 2, 3, 4]}))
+
+    assert write_parquet_sidecar(dataset) == 4
+
+    table = pq.read_table(parquet_path(dataset))
+    assert table.column("mixed").to_pylist() == ["1", "x", None, "2.5"]
+    assert table.column("number").to_pylist() == [1, 2, 3, 4]
+
+
+def test_xlsx_projection_rejects_unknown_columns():
+    dataset = _xlsx_dataset(9002, pd.DataFrame({"a": [1, 2], "b": [3, 4]}))
+
+    with pytest.raises(UnknownColumnsError) as error:
+        read_dataset(dataset, ["a", "missing"])
+    assert error.value.columns == ["missing"]
+
+    assert read_dataset(dataset, ["b"]).columns.tolist() == ["b"]
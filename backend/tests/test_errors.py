@@ -0,0 +1,15 @@
+import pickle
+
+import pytest
+
+from services.correlations import NonNumericColumnsError
+from services.dataset_io import UnknownColumnsError
+
+
+@pytest.mark.parametrize("error_type", [UnknownColumnsError, NonNumericColumnsError])
+def test_column_errors_survive_the_trip_back_from_a_worker(error_type):
+    error = pickle.loads(pickle.dumps(error_type(["s", "t"])))
+
+    assert type(error) is error_type
+    assert error.columns == ["s", "t"]
+    assert str(error) == str(error_type(["s", "t"]))
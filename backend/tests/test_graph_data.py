@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from routers.graphs import BoxSummaryData, HistogramData, LineData, ValueCountsData
+from services.graph_data import (
+    ARROW_STREAM_MEDIA_TYPE, HISTOGRAM_BIN_RULES, MAX_HISTOGRAM_BINS, SUMMARY_SCHEMAS, box_summaries, histogram,
+    summaries_table, value_counts, wants_arrow
+)
+
+SUMMARY_MODELS = {"histogram": HistogramData, "box": BoxSummaryData, "line": LineData, "counts": ValueCountsData}
+
+
+def test_histogram_caps_rule_bins_before_building_edges():
+    # fd on a tiny IQR with one far outlier asks for ~1e15 bins (terabytes of edges)
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.uniform(0, 1e-6, 10_000), [1e5]])
+
+    edges, counts = histogram(values, "fd")
+
+    assert len(counts) == MAX_HISTOGRAM_BINS
+    assert len(edges) == MAX_HISTOGRAM_BINS + 1
+    assert sum(counts) == len(values)
+
+
+@pytest.mark.parametrize("rule", HISTOGRAM_BIN_RULES)
+@pytest.mark.parametrize("value_range", [None, (0.0, 2.0)])
+def test_histogram_rules_match_numpy_below_the_cap(rule, value_range):
+    values = np.random.default_rng(1).normal(size=5_000)
+
+    edges, counts = histogram(values, rule, *(value_range or (None, None)))
+
+    expected_counts, expected_edges = np.histogram(values, rule, value_range)
+    np.testing.assert_allclose(edges, expected_edges)
+    assert counts == expected_counts.tolist()
+
+
+@pytest.mark.parametrize("kind", SUMMARY_SCHEMAS)
+def test_summary_schemas_follow_the_response_models(kind):
+    assert SUMMARY_SCHEMAS[kind].names == list(SUMMARY_MODELS[kind].model_fields)
+    assert summaries_table(kind, []).schema == SUMMARY_SCHEMAS[kind]
+
+
+def test_box_summaries_keep_their_types_when_values_are_missing():
+    # An ungrouped box over a column with no finite values: no group, no quartiles, no outliers
+    table = summaries_table("box", [BoxSummaryData(column_name="x", count=0, outlier_count=0, outliers=[])])
+
+    assert table.schema.field("group").type == pa.string()
+    assert table.schema.field("q1").type == pa.float64()
+    assert table.schema.field("outliers").type == pa.list_(pa.float64())
+    assert table.to_pylist()[0]["mean"] is None
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("*/*", False),
+    ("application/json", False),
+    ("application/*", False),
+    (ARROW_STREAM_MEDIA_TYPE, True),
+    (f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.9", True),
+    (f"application/json, {ARROW_STREAM_MEDIA_TYPE}", True),
+    ("Application/Vnd.Apache.Arrow.Stream ; q=0.5, */*;q=0.1", True),
+    (f"{ARROW_STREAM_MEDIA_TYPE};q=0", False),
+    (f"{ARROW_STREAM_MEDIA_TYPE};q=0, */*", False),
+    (f"{ARROW_STREAM_MEDIA_TYPE};q=0.5, application/json", False),
+    (f"{ARROW_STREAM_MEDIA_TYPE};q=oops, */*", False),
+    (f"{ARROW_STREAM_MEDIA_TYPE}-extra", False),
+])
+def test_wants_arrow_parses_media_ranges(accept, expected):
+    assert wants_arrow(accept) is expected
+
+
+def test_mixed_object_values_that_print_the_same_are_one_category():
+    values = pd.Series([1, "1", 2, None, "x", "1"], dtype=object)
+
+    assert value_counts(values) == (["1", "2", "x"], [3, 1, 1], 0, 3)
+    assert [group for group, _ in box_summaries(np.arange(6.0), values)] == ["1", "2", "x"]
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from services.insights_engine import compute_insights
+from services.sketches import TOP_K_CAPACITY
+
+
+def test_distinct_count_is_exact_past_the_top_k_capacity():
+    distinct = TOP_K_CAPACITY * 3
+    values = [f"v{i % distinct}" for i in range(distinct * 2)] + [None]
+    rows = {(r[0], r[1]): r for r in compute_insights(pd.DataFrame({"label": values}))}
+
+    _, _, text, value, error = rows[("label", "distinct_count")]
+    assert (text, value, error) == (str(distinct), float(distinct), None)
+
+
+def test_pool_task_reads_without_the_in_process_cache(db):
+    import os
+
+    from models import Dataset
+    from services.dataset_loader import cache_stats
+    from services.executor import ipc_to_table
+    from services.insights_engine import insights_task
+    from services.storage import UPLOAD_FOLDER
+
+    dataset = Dataset(name="pool", filename="pool_task.csv")
+    db.add(dataset)
+    db.commit()
+    pd.DataFrame({"x": [1.0, 2.0, 3.0], "g": ["a", "b", "a"]}).to_csv(
+        os.path.join(UPLOAD_FOLDER, dataset.filename), index=False
+    )
+    entries = cache_stats()["entries"]
+
+    table = ipc_to_table(insights_task(dataset.id, ["x", "g", "x"]))
+
+    assert sorted(set(table.column("column_name").to_pylist())) == ["g", "x"]
+    assert cache_stats()["entries"] == entries
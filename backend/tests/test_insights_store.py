@@ -0,0 +1,33 @@
+from models import Dataset, DatasetInsights
+from services import insights_store
+from services.insights_store import new_snapshot, query_insights, replace_insights
+
+
+def _rows(value: float):
+    return [("a", "mean", str(value), value, None), ("a", "std_dev", "1.0", 1.0, None)]
+
+
+def test_writer_that_loses_the_snapshot_race_collects_its_rows(db, monkeypatch):
+    gc_jobs = []
+    monkeypatch.setattr(insights_store, "enqueue", lambda kind, payload: gc_jobs.append((kind, payload)))
+
+    dataset = Dataset(name="race", filename="race.csv", content_hash="cd" * 32)
+    db.add(dataset)
+    db.commit()
+    dataset_id = dataset.id
+
+    # The slow writer allocated its snapshot first, the fast one switched the pointer first
+    slow_snapshot = new_snapshot(db, dataset_id)
+    db.commit()
+    replace_insights(db, dataset, _rows(2.0))
+    fast_snapshot = db.get(Dataset, dataset_id).insights_snapshot_id
+    assert fast_snapshot > slow_snapshot
+
+    monkeypatch.setattr(insights_store, "new_snapshot", lambda db, dataset_id: slow_snapshot)
+    replace_insights(db, db.get(Dataset, dataset_id), _rows(1.0))
+
+    assert db.get(Dataset, dataset_id).insights_snapshot_id == fast_snapshot
+    assert [row[2] for row in query_insights(db, dataset_id, metrics=["mean"])] == ["2.0"]
+    snapshots = {s for (s,) in db.query(DatasetInsights.snapshot_id).filter(DatasetInsights.dataset_id == dataset_id)}
+    assert snapshots == {fast_snapshot}
+    assert gc_jobs == [("insights_gc", {"dataset_id": dataset_id})]
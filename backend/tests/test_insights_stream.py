@@ -0,0 +1,98 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.insights_engine import compute_insights
+from services.insights_stream import StreamingProfile
+
+
+def _mode_row(rows, column):
+    return next(row for row in rows if row[0] == column and row[1] == "mode")
+
+
+def test_stream_mode_without_heavy_hitter_is_explicit():
+    # All values distinct: Misra-Gries cuts every counter
+    df = pd.DataFrame({"x": np.random.default_rng(0).exponential(size=30_000), "empty": np.nan})
+    profile = StreamingProfile(df.columns)
+    for start in range(0, len(df), 10_000):
+        profile.update(df.iloc[start:start + 10_000])
+
+    _, _, text, value, error = _mode_row(profile.rows(), "x")
+    assert value is None and error is None
+    assert text.startswith("No value occurs more than")
+    assert _mode_row(profile.rows(), "empty")[2:] == ("None", None, None)
+
+
+def test_stream_mode_matches_exact_mode_with_a_heavy_hitter():
+    values = np.concatenate([np.arange(5_000.0), np.full(2_000, 7.5)])
+    df = pd.DataFrame({"x": np.random.default_rng(1).permutation(values)})
+    profile = StreamingProfile(df.columns)
+    profile.update(df)
+
+    assert _mode_row(profile.rows(), "x")[3] == _mode_row(compute_insights(df), "x")[3] == 7.5
+
+
+def _profile(df, chunk_rows=2_000):
+    profile = StreamingProfile(df.columns)
+    for start in range(0, len(df), chunk_rows):
+        profile.update(df.iloc[start:start + chunk_rows])
+    return profile
+
+
+def test_merged_profiles_match_a_single_pass():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "x": rng.normal(10, 3, 20_000),
+        "k": rng.integers(0, 5, 20_000),
+        "g": rng.choice(["u", "v", "w"], 20_000),
+    })
+    df.loc[rng.choice(20_000, 500, replace=False), "x"] = np.nan
+
+    merged = _profile(df.iloc[:7_000])
+    # Profiles come back from compute-pool workers pickled
+    merged.merge(pickle.loads(pickle.dumps(_profile(df.iloc[7_000:]))))
+    single = {(r[0], r[1]): r for r in _profile(df).rows()}
+    exact = {(r[0], r[1]): r for r in compute_insights(df)}
+
+    for key, (_, _, text, value, error) in {(r[0], r[1]): r for r in merged.rows()}.items():
+        if key[1] in ("missing_count", "mean", "std_dev", "skewness", "kurtosis", "Q4 (Max)"):
+            assert value == pytest.approx(exact[key][3], rel=1e-9), key
+        elif key[1] in ("Q1", "Q2 (Median)", "Q3"):
+            assert abs(value - exact[key][3]) <= error + 1e-9, key
+        elif key[1] == "distinct_count" or key[1].startswith("top_") or key == ("k", "mode"):
+            assert text == single[key][2] == exact[key][2], key
+
+
+def test_stream_mode_profiles_row_groups_in_parallel_parts(db):
+    import os
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from models import Dataset
+    from services.executor import ipc_to_table
+    from services.insights_stream import merged_insights, row_group_parts, stream_insights_task, stream_profile_task
+    from services.storage import parquet_path
+
+    dataset = Dataset(name="groups", filename="groups.csv", content_hash="ef" * 32)
+    db.add(dataset)
+    db.commit()
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"x": rng.normal(size=9_000), "g": rng.choice(["a", "b"], 9_000)})
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), parquet_path(dataset), row_group_size=1_000)
+
+    parts = row_group_parts(dataset, 4)
+    assert len(parts) == 4
+    assert sorted(group for part in parts for group in part) == list(range(9))
+
+    parallel = ipc_to_table(merged_insights([stream_profile_task(dataset.id, None, part) for part in parts]))
+    single = ipc_to_table(stream_insights_task(dataset.id))
+    exact = {(r[0], r[1]): r[3] for r in compute_insights(df)}
+    assert parallel.column("metric_name").to_pylist() == single.column("metric_name").to_pylist()
+    names = ("column_name", "metric_name", "metric_value_num")
+    for column, metric, value in zip(*(parallel.column(name).to_pylist() for name in names)):
+        if metric in ("mean", "std_dev", "missing_count", "distinct_count", "top_1_count"):
+            assert value == pytest.approx(exact[(column, metric)], rel=1e-9)
+    os.remove(parquet_path(dataset))
@@ -0,0 +1,43 @@
+import sqlite3
+import threading
+import time
+
+from services import jobs
+
+
+def test_worker_survives_database_errors(monkeypatch, capsys):
+    jobs.init_queue()
+    monkeypatch.setattr(jobs, "HANDLER_MODULES", [])
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL", 0.01)
+    jobs.job_handler("test-echo")(lambda payload: payload)
+
+    failures = {"claim": 1, "finish": 1}
+
+    def flaky(name, func):
+        def call(*args, **kwargs):
+            if failures[name]:
+                failures[name] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return func(*args, **kwargs)
+        return call
+
+    monkeypatch.setattr(jobs, "_claim_next", flaky("claim", jobs._claim_next))
+    monkeypatch.setattr(jobs, "_finish", flaky("finish", jobs._finish))
+
+    job_id = jobs.enqueue("test-echo", {"value": 7})
+    stop_event = threading.Event()
+    worker = threading.Thread(target=jobs.worker_loop, args=(stop_event,))
+    worker.start()
+    try:
+        deadline = time.monotonic() + 10
+        while jobs.get_job(job_id)["status"] != "done" and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop_event.set()
+        worker.join(10)
+
+    job = jobs.get_job(job_id)
+    assert job["status"] == "done"
+    assert job["result"] == {"value": 7}
+    assert failures == {"claim": 0, "finish": 0}
+    assert capsys.readouterr().err.count("OperationalError: database is locked") == 2
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+
+from models import DatasetInsights
+
+
+def test_numeric_insight_columns_are_double_precision_on_mysql():
+    ddl = str(CreateTable(DatasetInsights.__table__).compile(dialect=mysql.dialect()))
+
+    # FLOAT(p) with p > 24 is DOUBLE in MySQL; a bare FLOAT keeps only ~7 digits
+    assert "metric_value_num FLOAT(53)" in ddl
+    assert "metric_error FLOAT(53)" in ddl
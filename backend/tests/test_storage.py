@@ -0,0 +1,34 @@
+import os
+from types import SimpleNamespace
+
+from services.storage import correlation_cache_path, prune_cache
+
+
+def _cache_file(folder, name: str, size: int, mtime: float) -> str:
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_prune_cache_removes_least_recently_used_files(tmp_path):
+    oldest = _cache_file(tmp_path, "a.arrow", 100, 1_000)
+    older = _cache_file(tmp_path, "b.arrow", 100, 2_000)
+    recent = _cache_file(tmp_path, "c.arrow", 100, 3_000)
+    keep = _cache_file(tmp_path, "d.arrow", 100, 500)
+    temp = _cache_file(tmp_path, "e.arrow.123.tmp", 100, 0)
+
+    prune_cache(str(tmp_path), 250, keep=keep)
+
+    assert not os.path.exists(oldest) and not os.path.exists(older)
+    assert os.path.exists(recent) and os.path.exists(keep) and os.path.exists(temp)
+
+
+def test_correlation_cache_is_keyed_by_content_hash_only():
+    hashed = SimpleNamespace(id=1, content_hash="ab" * 32)
+    same_content = SimpleNamespace(id=2, content_hash="ab" * 32)
+    unhashed = SimpleNamespace(id=3, content_hash=None)
+
+    assert correlation_cache_path(hashed, "pearson") == correlation_cache_path(same_content, "pearson")
+    assert correlation_cache_path(unhashed, "pearson") is None
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+
+import httpx
+import numpy as np
+import pytest
+
+# Size of the streamed upload and the slowest acceptable GET / while it is in flight
+UPLOAD_ROWS = 250_000
+MAX_PING_SECONDS = 0.1
+# Per-chunk work is slowed down to this (a slow disk), so any of it left on the event loop shows up in the pings
+SLOW_CHUNK_SECONDS = 0.2
+
+
+def _csv_bytes(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(rows, 3))
+    lines = ["a,b,c"] + [f"{a:.6f},{b:.6f},{c:.6f}" for a, b, c in values]
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def _chunks(data: bytes, size: int = 64 * 1024):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+        await asyncio.sleep(0)
+
+
+@pytest.mark.anyio
+async def test_upload_does_not_block_event_loop(app, monkeypatch):
+    from services.row_count import CsvRowCounter
+
+    feed = CsvRowCounter.feed
+
+    def slow_feed(self, chunk):
+        time.sleep(SLOW_CHUNK_SECONDS)
+        return feed(self, chunk)
+
+    monkeypatch.setattr(CsvRowCounter, "feed", slow_feed)
+
+    data = _csv_bytes(UPLOAD_ROWS)
+    assert len(data) > 5 * 1024 ** 2
+
+    boundary = "upload-concurrency-test"
+    head = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="big.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode()
+    body = head + data + f"\r\n--{boundary}--\r\n".encode()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        upload = asyncio.create_task(client.post(
+            "/upload/",
+            content=_chunks(body),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        ))
+
+        latencies = []
+        while not upload.done():
+            started = time.perf_counter()
+            response = await client.get("/")
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200
+            await asyncio.sleep(0.005)
+
+        response = await upload
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["size_bytes"] == len(data)
+    assert body["total_rows"] == UPLOAD_ROWS
+    assert len(latencies) >= 3
+    assert max(latencies) < MAX_PING_SECONDS, f"slowest ping {max(latencies):.3f}s"
+
+
+@pytest.mark.anyio
+async def test_upload_limits_apply_to_the_network_read(app, monkeypatch):
+    from routers import upload
+    from services.storage import TMP_FOLDER
+
+    monkeypatch.setattr(upload, "MAX_UPLOAD_SIZE", 1024 ** 2)
+    data = _csv_bytes(100_000)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Refused on Content-Length alone
+        response = await client.post("/upload/", files={"file": ("big.csv", data)})
+        assert response.status_code == 413
+
+        # No Content-Length: aborted once the streamed file passes the limit, partial file removed
+        boundary = "limit-test"
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.csv\"\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        response = await client.post(
+            "/upload/", content=_chunks(body), headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        )
+        assert response.status_code == 413
+        assert os.listdir(TMP_FOLDER) == []
+
+        response = await client.post("/upload/", files={"file": ("notes.txt", b"hello")})
+        assert response.status_code == 400
+
+        response = await client.post("/upload/", files={"file": ("small.csv", b"a,b\n1,2\n3,4\n")})
+        assert response.status_code == 200, response.text
+        assert response.json()["total_rows"] == 2
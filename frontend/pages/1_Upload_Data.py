@@ -11,6 +11,11 @@ if uploaded_file:
     if res is None:
         st.error("🚫 Cannot connect to backend API. Make sure it’s running.")
     elif res.status_code == 200:
+        body = res.json()
         st.success("✅ File uploaded successfully!")
+        if body.get("job_id"):
+            st.info(f"⏳ Dataset {body['dataset_id']} is being processed in the background (job {body['job_id']}).")
+        else:
+            st.info(f"♻️ Identical file already processed, dataset {body['dataset_id']} reuses its results.")
     else:
         st.error(f"❌ Upload failed (Status: {res.status_code})")
@@ -1,5 +1,6 @@
 import streamlit as st
-from utils.api_client import get_insights, get_data # adjust import if needed
+import pandas as pd
+from utils.api_client import get_insights, get_data, get_stored_insights # adjust import if needed
 
 st.title("📊 Generate Insights")
 
@@ -10,19 +11,45 @@ if datasets_response is not None and datasets_response.status_code == 200:
     
     if datasets:
         # 2️⃣ Let user select dataset
-        dataset_options = {d["name"]: d["dataset_id"] for d in datasets}
+        dataset_options = {f"{d['name']} (#{d['dataset_id']})": d["dataset_id"] for d in datasets}
         selected_name = st.selectbox("Select a dataset", list(dataset_options.keys()))
         selected_id = dataset_options[selected_name]
         
+        mode = st.selectbox(
+            "Mode", ["auto", "exact", "stream", "approx"],
+            help="stream profiles the file chunk by chunk (approximate quartiles and mode) for files larger than memory; "
+                 "approx profiles a random sample and reports confidence intervals"
+        )
+        sample, schedule_exact = None, False
+        if mode == "approx":
+            sample = st.number_input("Sample (fraction of rows if ≤ 1, else row count)", min_value=0.001, value=0.01)
+            schedule_exact = st.checkbox("Compute exact insights in the background afterwards")
+        force = st.checkbox("Recompute even if insights are up to date")
+
         # 3️⃣ Generate Insights button
         if st.button("Generate Insights"):
-            res = get_insights(selected_id)
+            res = get_insights(selected_id, force=force, mode=mode, sample=sample, schedule_exact=schedule_exact)
             if res and res.status_code == 200:
                 data = res.json()
-                st.success(f"✅ {data['insights_count']} insights generated successfully!")
+                if data.get("cached"):
+                    st.success(f"✅ {data['insights_count']} insights are up to date (loaded from storage).")
+                else:
+                    st.success(f"✅ {data['insights_count']} insights generated successfully!")
+                if data.get("exact_job_id"):
+                    st.info(f"Exact insights are being computed in the background (job #{data['exact_job_id']}).")
                 st.json(data)
             else:
                 st.error("Failed to generate insights.")
+
+        # 4️⃣ Browse stored insights (read-only, nothing is recomputed)
+        metrics = st.text_input("Metrics to show (comma-separated, leave empty for all)")
+        if st.button("Show Stored Insights"):
+            wanted = [m.strip() for m in metrics.split(",") if m.strip()] or None
+            res = get_stored_insights(selected_id, metrics=wanted)
+            if res and res.status_code == 200:
+                st.dataframe(pd.DataFrame(res.json()["insights"]), use_container_width=True)
+            else:
+                st.error("Failed to load stored insights.")
     else:
         st.warning("No datasets available.")
 else:
@@ -11,7 +11,7 @@ if datasets_response is not None and datasets_response.status_code == 200:
 
     if datasets:
         # 2️⃣ Let user select dataset
-        dataset_options = {d["name"]: d["dataset_id"] for d in datasets}
+        dataset_options = {f"{d['name']} (#{d['dataset_id']})": d["dataset_id"] for d in datasets}
         selected_name = st.selectbox("Select a dataset", list(dataset_options.keys()))
 
         if st.button("📄 Generate Report"):
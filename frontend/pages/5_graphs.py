@@ -1,51 +1,146 @@
 import streamlit as st
 import requests
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
 
 st.set_page_config(page_title="Dataset Plots", layout="wide")
+
+
+def box_figure(boxes, title, y_label, x_label=None):
+    """Box plot drawn from server-side summaries (one per box) plus their listed outliers."""
+    positions = [b['group'] if b['group'] is not None else y_label for b in boxes]
+    fig = go.Figure(go.Box(
+        x=positions, q1=[b['q1'] for b in boxes], median=[b['median'] for b in boxes], q3=[b['q3'] for b in boxes],
+        lowerfence=[b['whisker_low'] for b in boxes], upperfence=[b['whisker_high'] for b in boxes],
+        mean=[b['mean'] for b in boxes], name=y_label, boxpoints=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=[pos for pos, b in zip(positions, boxes) for _ in b['outliers']],
+        y=[v for b in boxes for v in b['outliers']],
+        mode="markers", name="outliers"
+    ))
+    fig.update_layout(title=title, yaxis_title=y_label, xaxis_title=x_label, showlegend=False)
+    return fig
+
+
 st.title("📊 Dataset Graphs Dashboard")
 
 # --- Input: Dataset ID
 dataset_id = st.number_input("Enter Dataset ID", min_value=1, step=1)
+columns = st.text_input("Columns (comma-separated, leave empty for all)")
+bins = st.text_input("Histogram bins (a count, or auto / fd / doane / scott / stone / rice / sturges / sqrt)", value="auto")
+max_points = st.number_input("Points per line plot", min_value=3, value=2000, step=500)
+downsample = st.selectbox("Line downsampling", ["lttb", "minmax"],
+                          help="lttb keeps the visual shape; minmax keeps every bucket's extremes (spikes)")
+
+top_n = st.number_input("Bars per categorical column (the rest are grouped as Other)", min_value=1, value=20, step=5)
+
+
+def fetch_graph_data(params: dict, kind: str, **options):
+    """One server-side summary kind of /graphs; only aggregates travel, never every raw value."""
+    resp = requests.get(f"http://localhost:8000/graphs/{dataset_id}", params=dict(params, kind=kind, **options))
+    resp.raise_for_status()
+    return resp.json()
+
 
 if st.button("Generate Graphs"):
     try:
-        # Call backend endpoint that reads dataset directly
-        resp = requests.get(f"http://localhost:8000/graphs/{dataset_id}")
-        resp.raise_for_status()
-        data = resp.json()
+        params = {"columns": columns} if columns.strip() else {}
+        # Kept across reruns so the pickers below do not refetch the data
+        st.session_state["graph_data"] = {
+            # Histograms are binned on the server, so only edges and counts travel
+            "histograms": {h['column_name']: h for h in fetch_graph_data(params, "histogram", bins=bins.strip() or "auto")['histograms']},
+            # Box plots come as five-number summaries with a capped list of outliers
+            "boxes": {b['column_name']: b for b in fetch_graph_data(params, "box")['boxes']},
+            # Long series are downsampled on the server to at most max_points points
+            "lines": {l['column_name']: l for l in fetch_graph_data(params, "line", max_points=int(max_points), downsample=downsample)['lines']},
+            # Categorical columns: top_n value counts plus the total of all other values
+            "counts": {c['column_name']: c for c in fetch_graph_data(params, "counts", top_n=int(top_n))['value_counts']},
+        }
     except Exception as e:
         st.error(f"Failed to fetch dataset: {e}")
         st.stop()
 
+data = st.session_state.get("graph_data")
+if data:
+    numeric_names = list(data['boxes'])
+    categorical_names = list(data['counts'])
+
     # --- Plot numeric columns
     st.subheader("Numeric Columns")
-    for col in data['numeric']:
-        fig_box = px.box(y=col['values'], labels={"y": col['column_name']}, title=f"Boxplot: {col['column_name']}")
-        st.plotly_chart(fig_box, use_container_width=True)
+    for name in numeric_names:
+        box = data['boxes'][name]
+        if box['count']:
+            fig_box = box_figure([box], f"Boxplot: {name}", name)
+            st.plotly_chart(fig_box, use_container_width=True)
 
-        fig_hist = px.histogram(col['values'], nbins=20, labels={"value": col['column_name']}, title=f"Histogram: {col['column_name']}")
+        hist = data['histograms'][name]
+        edges = hist['edges']
+        fig_hist = go.Figure(go.Bar(
+            x=[(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+            y=hist['counts'],
+            width=[hi - lo for lo, hi in zip(edges[:-1], edges[1:])]
+        ))
+        fig_hist.update_layout(title=f"Histogram: {name}", xaxis_title=name, yaxis_title="Count", bargap=0)
         st.plotly_chart(fig_hist, use_container_width=True)
 
-        fig_line = px.line(y=col['values'], labels={"y": col['column_name'], "x": "Row Index"}, title=f"Lineplot: {col['column_name']}")
+        line = data['lines'][name]
+        fig_line = px.line(x=line['x'], y=line['y'], labels={"y": name, "x": "Row Index"},
+                           title=f"Lineplot: {name} ({len(line['x'])} of {line['total_points']} points)")
         st.plotly_chart(fig_line, use_container_width=True)
 
     # --- Plot categorical columns
     st.subheader("Categorical Columns")
-    for col in data['categorical']:
-        counts = {v: col['values'].count(v) for v in set(col['values'])}
-        fig_bar = px.bar(x=list(counts.keys()), y=list(counts.values()), labels={"x": col['column_name'], "y": "Count"}, title=f"Bar Chart: {col['column_name']}")
+    for name in categorical_names:
+        counts = data['counts'][name]
+        labels, totals = list(counts['values']), list(counts['counts'])
+        if counts['other_count']:
+            labels.append(f"Other ({counts['distinct_count'] - len(counts['values'])} values)")
+            totals.append(counts['other_count'])
+        fig_bar = px.bar(x=labels, y=totals, labels={"x": name, "y": "Count"}, title=f"Bar Chart: {name}")
         st.plotly_chart(fig_bar, use_container_width=True)
 
-    # --- Numeric vs Categorical Example
-    if data['numeric'] and data['categorical']:
-        numeric_col = data['numeric'][0]
-        categorical_col = data['categorical'][0]
-        df = pd.DataFrame({
-            numeric_col['column_name']: numeric_col['values'][:len(categorical_col['values'])],
-            categorical_col['column_name']: categorical_col['values'][:len(numeric_col['values'])]
-        })
-        fig_box_grouped = px.box(df, x=categorical_col['column_name'], y=numeric_col['column_name'],
-                                 title=f"{numeric_col['column_name']} by {categorical_col['column_name']}")
-        st.plotly_chart(fig_box_grouped, use_container_width=True)
+    # --- Numeric vs Categorical
+    if numeric_names and categorical_names:
+        st.subheader("Numeric by Categorical")
+        pick_numeric, pick_categorical = st.columns(2)
+        numeric_name = pick_numeric.selectbox("Numeric column", numeric_names)
+        categorical_name = pick_categorical.selectbox("Group by", categorical_names)
+        # One summary per group, computed on the server over rows where both columns are present
+        resp = requests.get(
+            f"http://localhost:8000/graphs/{dataset_id}",
+            params={"kind": "box", "columns": numeric_name, "group_by": categorical_name}
+        )
+        if resp.ok:
+            boxes = [b for b in resp.json()['boxes'] if b['count']]
+            fig_box_grouped = box_figure(boxes, f"{numeric_name} by {categorical_name}", numeric_name, categorical_name)
+            st.plotly_chart(fig_box_grouped, use_container_width=True)
+        else:
+            st.error(f"Failed to fetch grouped box plot: {resp.text}")
+
+# --- Correlations between numeric columns
+st.subheader("Correlations")
+method = st.selectbox("Method", ["pearson", "spearman"])
+top_k = st.number_input("Strongest pairs only (0 = full matrix)", min_value=0, value=0, step=1)
+
+if st.button("Compute Correlations"):
+    try:
+        params = {"method": method}
+        if columns.strip():
+            params["columns"] = columns
+        if top_k:
+            params["top_k"] = int(top_k)
+        resp = requests.get(f"http://localhost:8000/insights/{dataset_id}/correlations", params=params)
+        resp.raise_for_status()
+        result = resp.json()
+    except Exception as e:
+        st.error(f"Failed to compute correlations: {e}")
+        st.stop()
+
+    if top_k:
+        st.dataframe(pd.DataFrame(result['pairs']), use_container_width=True)
+    else:
+        fig_corr = px.imshow(result['matrix'], x=result['columns'], y=result['columns'], zmin=-1, zmax=1,
+                             color_continuous_scale="RdBu_r", title=f"{method.title()} correlation")
+        st.plotly_chart(fig_corr, use_container_width=True)
@@ -1,7 +1,9 @@
+import pyarrow as pa
 import requests
 import streamlit as st
 
 BASE_URL = "http://127.0.0.1:8000"  # Make sure FastAPI backend runs here
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
 
 
 def upload_file(uploaded_file):
@@ -48,15 +50,63 @@ def get_data():
         return None
 
 
-def get_insights(dataset_id: int):
-    """Generate insights for a specific dataset."""
+def get_insights(dataset_id: int, columns=None, force: bool = False, mode: str = "auto",
+                 sample=None, schedule_exact: bool = False):
+    """Generate insights for a specific dataset (optionally only for the given columns).
+    Up-to-date stored insights are returned as-is unless `force` is set.
+    `mode` is exact, stream (chunked, for files larger than memory), approx (on a `sample` of rows,
+    optionally followed by an exact recompute in the background) or auto."""
+    params = {"columns": ",".join(columns)} if columns else {}
+    params["mode"] = mode
+    if force:
+        params["force"] = "true"
+    if sample is not None:
+        params["sample"] = sample
+    if schedule_exact:
+        params["schedule_exact"] = "true"
     try:
-        return requests.get(f"{BASE_URL}/insights/generate/{dataset_id}")
+        return requests.get(f"{BASE_URL}/insights/generate/{dataset_id}", params=params)
     except requests.exceptions.ConnectionError:
         st.error("🚫 Backend not running for /insights.")
         return None
 
 
+def get_stored_insights(dataset_id: int, columns=None, metrics=None):
+    """Read stored insights without recomputing them, optionally only some columns and metrics."""
+    params = {}
+    if columns:
+        params["columns"] = ",".join(columns)
+    if metrics:
+        params["metrics"] = ",".join(metrics)
+    try:
+        return requests.get(f"{BASE_URL}/insights/{dataset_id}", params=params)
+    except requests.exceptions.ConnectionError:
+        st.error("🚫 Backend not running for /insights.")
+        return None
+
+
+def get_graph_data(dataset_id: int, kind: str = "raw", columns=None, arrow: bool = False, **options):
+    """Fetch /graphs data of one `kind` (raw, histogram, box, line, counts; `options` are its query parameters).
+    With `arrow` the server sends an Arrow IPC stream, decoded here into a pyarrow Table
+    (kind=raw: one column per dataset column, missing values as nulls; other kinds: one row per summary);
+    otherwise the JSON body is returned as a dict. None when the request fails."""
+    params = dict(options, kind=kind)
+    if columns:
+        params["columns"] = ",".join(columns)
+    headers = {"Accept": ARROW_STREAM_MEDIA_TYPE} if arrow else None
+    try:
+        resp = requests.get(f"{BASE_URL}/graphs/{dataset_id}", params=params, headers=headers)
+    except requests.exceptions.ConnectionError:
+        st.error("🚫 Backend not running for /graphs.")
+        return None
+    if resp.status_code != 200:
+        st.error(f"Failed to fetch graph data: {resp.text}")
+        return None
+    if arrow:
+        return pa.ipc.open_stream(resp.content).read_all()
+    return resp.json()
+
+
 def get_report(dataset_id: int):
     """Generate report for a specific dataset."""
     try:
@@ -64,3 +114,12 @@ def get_report(dataset_id: int):
     except requests.exceptions.ConnectionError:
         st.error("🚫 Backend not running for /reports.")
         return None
+
+
+def get_job(job_id: int):
+    """Fetch the status of a background job (e.g. dataset ingest)."""
+    try:
+        return requests.get(f"{BASE_URL}/jobs/{job_id}")
+    except requests.exceptions.ConnectionError:
+        st.error("🚫 Backend not running for /jobs.")
+        return None